@@ -0,0 +1,264 @@
+""" Benchmarks for the hot paths of lazyman_stock_research.
+
+Runs against the fixture provider unless LAZYMAN_PROVIDER says otherwise, so results are repeatable
+and need no network. Point LAZYMAN_FIXTURE_DIR at a directory made by `record_fixtures` to use
+recorded data and saved quote pages.
+
+    python benchmarks.py                 # run everything
+    python benchmarks.py quote_parse     # run selected benchmarks
+"""
+import glob
+import numpy as np
+import pandas as pd
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+
+os.environ.setdefault('LAZYMAN_PROVIDER', 'fixture')
+
+import lazyman_stock_research as app
+
+
+def measure(func, repeat=5):
+    ## best wall time over `repeat` runs and the peak traced allocation of a single run
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak
+
+def report(name, seconds, peak=None, extra=''):
+    line = '  %-38s %10.3f ms' % (name, seconds * 1000)
+    if peak is not None:
+        line += '  %10.1f KiB peak' % (peak / 1024)
+    print(line + ('  ' + extra if extra else ''))
+
+
+## Quote page parsing (market_index)
+
+def saved_quote_pages():
+    ## recorded pages when available, otherwise the fixture page buried in Yahoo-sized filler markup
+    root  = os.environ.get('LAZYMAN_FIXTURE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures'))
+    pages = {}
+    for path in sorted(glob.glob(os.path.join(root, 'quotes', '*.html'))):
+        with open(path, encoding='utf-8') as f:
+            pages[os.path.basename(path)] = f.read()
+    if not pages:
+        filler = '<div class="Fl(start)"><span>lorem</span><a href="#">ipsum</a><script>var x = 1;</script></div>' * 6000
+        for name in app.MARKET_INDEXES:
+            page = app.provider.quote_page(name)
+            head, tail = page.split('<body>')
+            pages[name + ' (synthetic)'] = head + '<body>' + filler + tail.replace('</body>', filler + '</body>')
+    return pages
+
+def full_tree_parse(page):
+    ## the original implementation: build the whole document tree to find one div
+    web_content = app.BeautifulSoup(page, 'lxml')
+    web_content_div = web_content.find_all('div', attrs = {'class': app.QUOTE_DIV_CLASS})
+    spans = web_content_div[0].find_all('span')
+    return tuple(span.get_text() for span in spans[:3])
+
+def bench_quote_parse():
+    for name, page in saved_quote_pages().items():
+        assert full_tree_parse(page) == app.parse_quote_page(page), name
+        print('%s (%.0f KiB)' % (name, len(page) / 1024))
+        report('full BeautifulSoup tree', *measure(lambda: full_tree_parse(page), repeat=3))
+        report('parse_quote_page', *measure(lambda: app.parse_quote_page(page), repeat=3))
+
+
+## Startup (module import up to the first served page)
+
+FIRST_REQUEST = """
+import time
+began = time.perf_counter()
+import lazyman_stock_research as app
+app.app.server.test_client().get('/')
+print(time.perf_counter() - began, app.startup_seconds)
+"""
+
+def bench_startup():
+    here = os.path.dirname(os.path.abspath(__file__))
+    runs = []
+    for _ in range(3):
+        out = subprocess.run([sys.executable, '-W', 'ignore', '-c', FIRST_REQUEST], cwd=here,
+                             capture_output=True, text=True, check=True).stdout.split()
+        runs.append((float(out[0]), float(out[1])))
+    first_request, module_import = min(runs)
+    report('module import', module_import)
+    report('time to first request', first_request,
+           extra='(budget %.1f s%s)' % (app.STARTUP_BUDGET, '' if first_request <= app.STARTUP_BUDGET else ', OVER'))
+
+
+## KDJ (get_indicators)
+
+def kdj_reference(H, L, C, df):
+    ## the original loop implementation, kept as the correctness oracle
+    L9 = L.rolling(9).min()
+    H9 = H.rolling(9).max()
+    RSV = 100 * ((C - L9) / (H9 - L9)).values
+    k0, k_out = 50, []
+    for j in range(len(RSV)):
+        if RSV[j] == RSV[j]:
+            k0 = 1/3 * RSV[j] + 2/3 * k0
+            k_out.append(k0)
+        else:
+            k_out.append(np.nan)
+    d0, d_out = 50, []
+    for j in range(len(RSV)):
+        if k_out[j] == k_out[j]:
+            d0 = 1/3 * k_out[j] + 2/3 * d0
+            d_out.append(d0)
+        else:
+            d_out.append(np.nan)
+    J = (3 * np.array(k_out)) - (2 * np.array(d_out))
+    kdj = pd.concat([pd.Series(k_out, name = 'K'), pd.Series(d_out, name = 'D'), pd.Series(J, name = 'J')], axis=1)
+    kdj.set_index(df.index, inplace=True)
+    return kdj
+
+def random_bars(n, seed=0):
+    rng   = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+    open_ = np.r_[close[0], close[:-1]]
+    high  = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.01, n)))
+    low   = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.01, n)))
+    index = pd.date_range('2000-01-03', periods=n, freq='min', name='Date')
+    return pd.DataFrame({'Open': open_, 'High': high, 'Low': low, 'Close': close,
+                         'Volume': rng.integers(10**5, 10**7, n).astype(float)}, index = index)
+
+def check_kdj():
+    df = random_bars(5000, seed=1)
+    ## flat stretches (H9 == L9 gives NaN RSV mid-series) and missing bars
+    df.iloc[1000:1020, :4] = 50.0
+    df.iloc[3000:3005] = np.nan
+    for frame in [df, df.iloc[:5], df.iloc[:0]]:
+        expected = kdj_reference(frame['High'], frame['Low'], frame['Close'], frame)
+        got      = app.KDJ(frame['High'], frame['Low'], frame['Close'], frame)
+        pd.testing.assert_frame_equal(got, expected, check_exact=False, rtol=1e-10, check_dtype=False)
+    print('  vectorized KDJ matches the loop implementation')
+
+def bench_kdj():
+    check_kdj()
+    for n in [10000, 100000, 1000000]:
+        df = random_bars(n)
+        H, L, C = df['High'], df['Low'], df['Close']
+        print('%d bars' % n)
+        report('loop KDJ', measure(lambda: kdj_reference(H, L, C, df), repeat=1 if n >= 1000000 else 3)[0])
+        report('vectorized KDJ', measure(lambda: app.KDJ(H, L, C, df), repeat=3)[0])
+
+
+## Technical figure (update_chart)
+
+CHART_RANGES = [('1Y', 365), ('5Y', 5 * 365), ('20Y', 20 * 365)]
+
+def bench_technical_figure():
+    import plotly.io as pio
+    end = pd.Timestamp.now().normalize()
+    for label, days in CHART_RANGES:
+        start = (end - pd.Timedelta(days=days)).strftime('%Y-%m-%d')
+        df, tech = app.technical_frame('AAPL', start, end.strftime('%Y-%m-%d'))
+        print('%s (%d bars)' % (label, len(df)))
+        full        = lambda: app.technical_figure(df, tech, 'Apple Inc.')
+        def downsampled():
+            bars, indicators, full_days = app.ohlc_buckets(df, tech)
+            return app.technical_figure(bars, indicators, 'Apple Inc.', full_days = full_days)
+        for name, build in [('technical_figure', full), ('ohlc_buckets + technical_figure', downsampled)]:
+            size = len(pio.to_json(build(), validate=False))
+            report(name, *measure(build, repeat=3), extra='%.0f KiB JSON' % (size / 1024))
+
+
+## Tables (make_dash_table / render_table)
+
+def iterrows_table(df):
+    ## the original implementation: one html.Td per cell, built through iterrows
+    table = []
+    for index, row in df.iterrows():
+        html_row = []
+        for i in range(len(row)):
+            html_row.append(app.html.Td([row[i]]))
+        table.append(app.html.Tr(html_row))
+    return app.html.Table(table)
+
+def statement_history(rows, seed=0):
+    ## a formatted statement history: date column plus eight KPI columns
+    rng    = np.random.default_rng(seed)
+    values = pd.DataFrame(rng.normal(0, 1e9, (rows, 8)), columns = [kpi for kpi, _ in app.INCOME_KPIS])
+    table  = app.format_kpis(values, [kind for _, kind in app.INCOME_KPIS])
+    table.insert(0, 'fiscalDateEnding', pd.date_range('1990-03-31', periods=rows, freq='D').strftime('%Y-%m-%d'))
+    return table
+
+def bench_tables():
+    import plotly.io as pio
+    for rows in [8, 100, 1000, 5000]:
+        df = statement_history(rows)
+        print('%d rows x %d columns' % df.shape)
+        for name, render in [('iterrows html.Table', iterrows_table), ('render_table', app.render_table)]:
+            payload = lambda: pio.json.to_json_plotly(render(df))
+            report(name, *measure(payload, repeat=1 if rows >= 1000 else 3), extra='%.0f KiB response' % (len(payload()) / 1024))
+
+
+## Technical scanner (scan_universe)
+
+class SyntheticMatrix:
+    ## the attributes scan_universe reads from a PriceMatrix, filled with random walks
+    def __init__(self, symbols, days, seed=0):
+        rng   = np.random.default_rng(seed)
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, (symbols, days)), axis=1))
+        self.dates   = pd.bdate_range('2000-01-03', periods=days).values.astype('datetime64[D]')
+        self.symbols = ['S%05d' % i for i in range(symbols)]
+        self.values  = np.stack([close, close * 1.01, close * 0.99, close, np.full_like(close, 1e6)])
+
+def per_ticker_scan(matrix, count):
+    ## the single-frame path: get_indicators per symbol, then the last-bar tests; the indicator cache
+    ## is emptied first so every symbol is computed, as on a cold server
+    app.indicator_cache.clear()
+    for i in range(count):
+        df   = pd.DataFrame(matrix.values[:, i, -app.SCAN_BARS:].T, columns = app.MATRIX_FIELDS)
+        tech = app.get_indicators(df)
+        tech['macd_hist'].iloc[-2:].to_numpy(), tech['J'].iloc[-1], tech['ma250'].iloc[-1]
+
+def check_scanner():
+    matrix = SyntheticMatrix(20, 700, seed=3)
+    ## a late listing: no bars for the first 300 days
+    matrix.values[:, 5, :300] = np.nan
+    ind = app.scan_indicators(*(matrix.values[app.MATRIX_FIELDS.index(field)] for field in ['High', 'Low', 'Close']))
+    for i in range(len(matrix.symbols)):
+        listed = ~np.isnan(matrix.values[3, i])
+        df     = pd.DataFrame(matrix.values[:, i, listed].T, columns = app.MATRIX_FIELDS)
+        tech   = app.get_indicators(df, ['macd', 'ma250', 'rsi', 'kdj'])
+        for column in ['macd_hist', 'ma250', 'rsi', 'J']:
+            assert np.isnan(ind[column][i, ~listed]).all(), (matrix.symbols[i], column)
+            np.testing.assert_allclose(ind[column][i, listed], tech[column].to_numpy(), rtol=1e-9, atol=1e-9,
+                                       err_msg = '%s %s' % (matrix.symbols[i], column))
+    print('  scan_indicators matches get_indicators per symbol')
+
+def bench_scanner():
+    check_scanner()
+    for seed, symbols in enumerate([1000, 5000]):
+        matrix = SyntheticMatrix(symbols, 1250, seed=seed)
+        print('%d symbols x %d days' % (symbols, len(matrix.dates)))
+        sample = 100
+        loop = measure(lambda: per_ticker_scan(matrix, sample), repeat=1)[0]
+        report('per-ticker get_indicators (extrapolated)', loop * symbols / sample)
+        report('scan_universe, all signals', measure(lambda: app.scan_universe(matrix = matrix), repeat=1)[0])
+
+
+BENCHMARKS = {
+    'quote_parse'      : bench_quote_parse,
+    'startup'          : bench_startup,
+    'kdj'              : bench_kdj,
+    'technical_figure' : bench_technical_figure,
+    'tables'           : bench_tables,
+    'scanner'          : bench_scanner,
+}
+
+if __name__ == '__main__':
+    for name in sys.argv[1:] or BENCHMARKS:
+        print('== %s' % name)
+        BENCHMARKS[name]()
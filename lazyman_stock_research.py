@@ -1,3 +1,6 @@
+import time
+startup_began = time.perf_counter()   # time-to-first-request is measured from here
+
 ### Yahoo Finanace
 import yfinance as yf
 import plotly
@@ -17,21 +20,439 @@ import dash
 from dash import dcc
 from dash import html
 from dash import dash_table
-from dash.dependencies import Input, Output, State
-import time
+from dash import Patch
+from dash.dependencies import Input, Output, State, MATCH, ALL
+from dash.exceptions import PreventUpdate
 import plotly.io as pio
 pio.renderers.default='notebook'
 
+import os
+import re
+import json
+import warnings
+import zlib
+import difflib
+import uuid
+import shutil
+import argparse
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+
 import requests
+from requests.adapters import HTTPAdapter
 from requests.exceptions import ConnectionError
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
+
+
+## Market Data Providers
+## every upstream read (quotes, history, info, statements, ticker universe) goes through `provider`,
+## so the app can be profiled deterministically or run in a sealed environment
+
+TICKER_UNIVERSE_URL = "https://github.com/tylerjiang1127/Stock-Tickers/blob/main/all_tickers.csv?raw=true"
+MARKET_TZ = 'America/New_York'
+
+class MarketDataProvider:
+    """ Interface of a market data source """
+    name = 'base'
+
+    def info(self, symbol):
+        raise NotImplementedError
+
+    def history(self, symbol, start=None, end=None, interval="1d", period=None):
+        raise NotImplementedError
+
+    def statements(self, symbol):
+        """ Return {'Yearly': (income, balance, cashflow), 'Quarterly': (...)} with fiscal dates as rows """
+        raise NotImplementedError
+
+    def quote_page(self, name):
+        raise NotImplementedError
+
+    def ticker_universe(self):
+        raise NotImplementedError
+
+
+class YahooProvider(MarketDataProvider):
+    """ Live data from Yahoo Finance """
+    name    = 'yahoo'
+    headers = { 'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/71.0.3578.98 Safari/537.36' }
+    timeout = (3.05, 10)    # (connect, read) seconds per quote page request
+
+    def __init__(self, pool_size=8):
+        ## keep-alive connections to finance.yahoo.com shared by all quote page requests
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+
+    def info(self, symbol):
+        return yf.Ticker(symbol).info
+
+    def history(self, symbol, start=None, end=None, interval="1d", period=None):
+        if period is not None:
+            return yf.Ticker(symbol).history(period=period, interval=interval)
+        return yf.Ticker(symbol).history(start=start, end=end, interval=interval)
+
+    def statements(self, symbol):
+        ticker = yf.Ticker(symbol)
+        return {
+            'Yearly'    : (ticker.incomestmt.transpose(),
+                           ticker.balancesheet.transpose(),
+                           ticker.cashflow.transpose()),
+            'Quarterly' : (ticker.quarterly_incomestmt.transpose(),
+                           ticker.quarterly_balancesheet.transpose(),
+                           ticker.quarterly_cashflow.transpose()),
+        }
+
+    def quote_page(self, name):
+        url = 'https://finance.yahoo.com/quote/%5E'+name+'?p=%5E'+name
+        return self.session.get(url, timeout=self.timeout).text
+
+    def ticker_universe(self):
+        return pd.read_csv(TICKER_UNIVERSE_URL, usecols=["Symbol","Name"], keep_default_na=False, na_values=[''])
+
+
+STATEMENT_FILES = ['income', 'balance', 'cashflow']
+
+FIXTURE_UNIVERSE = [
+    ['AAPL', 'Apple Inc. Common Stock'],
+    ['MSFT', 'Microsoft Corporation Common Stock'],
+    ['AMZN', 'Amazon.com, Inc. Common Stock'],
+    ['GOOGL', 'Alphabet Inc. Class A Common Stock'],
+    ['META', 'Meta Platforms, Inc. Class A Common Stock'],
+    ['NVDA', 'NVIDIA Corporation Common Stock'],
+    ['TSLA', 'Tesla, Inc. Common Stock'],
+    ['JPM', 'JP Morgan Chase & Co. Common Stock'],
+    ['V', 'Visa Inc.'],
+    ['JNJ', 'Johnson & Johnson Common Stock'],
+    ['WMT', 'Walmart Inc. Common Stock'],
+    ['KO', 'Coca-Cola Company (The) Common Stock'],
+]
+
+def _period_bounds(start, end, period):
+    ## turn start/end strings or a yfinance style period ('5d', '1mo', '1y') into market-time timestamps
+    if period is not None:
+        end = pd.Timestamp.now(tz=MARKET_TZ).normalize() + pd.Timedelta(days=1)
+        if period == 'max':
+            return pd.Timestamp('2000-01-01', tz=MARKET_TZ), end
+        count, unit = int(period.rstrip('dmoy')), period.lstrip('0123456789')
+        offset = {'d': pd.offsets.BDay(count), 'mo': pd.DateOffset(months=count), 'y': pd.DateOffset(years=count)}[unit]
+        return end - offset, end
+    start = pd.Timestamp(start or '2000-01-01').tz_localize(MARKET_TZ)
+    end   = pd.Timestamp(end).tz_localize(MARKET_TZ) if end else pd.Timestamp.now(tz=MARKET_TZ).normalize() + pd.Timedelta(days=1)
+    return start, end
+
+
+class FixtureProvider(MarketDataProvider):
+    """ File-backed provider for benchmarks and sealed environments.
+
+    Recorded data is read from `root` (see `record_fixtures` for the layout). Symbols in the fixture
+    universe and indexes without recordings get deterministic generated data, so repeated runs see
+    exactly the same bars. """
+    name = 'fixture'
+
+    def __init__(self, root):
+        self.root = root
+        self._generated = {}
+        self._universe  = None
+        self._lock = threading.Lock()
+
+    def _path(self, *parts):
+        return os.path.join(self.root, *parts)
+
+    def _known(self, symbol):
+        return (symbol.startswith('^') or os.path.isdir(self._path(symbol))
+                or (self.ticker_universe()['Symbol'] == symbol).any())
+
+    def _seed(self, *parts):
+        return zlib.crc32('|'.join(str(part) for part in parts).encode())
+
+    def _read_bars(self, symbol, interval):
+        path = self._path(symbol, 'history_%s.csv' % interval)
+        if not os.path.exists(path):
+            return None
+        bars = pd.read_csv(path, index_col=0)
+        bars.index = pd.to_datetime(bars.index, utc=True).tz_convert(MARKET_TZ).rename('Date' if interval == "1d" else 'Datetime')
+        return bars
+
+    def _daily_bars(self, symbol):
+        with self._lock:
+            bars = self._generated.get(symbol)
+        if bars is not None:
+            return bars
+        bars = self._read_bars(symbol, "1d")
+        if bars is None:
+            rng    = np.random.default_rng(self._seed(symbol))
+            dates  = pd.bdate_range('2000-01-03', pd.Timestamp.now(tz=MARKET_TZ).tz_localize(None).normalize(), tz=MARKET_TZ, name='Date')
+            n      = len(dates)
+            close  = rng.uniform(20, 400) * np.exp(np.cumsum(rng.normal(0.0003, 0.02, n)))
+            open_  = np.r_[close[0], close[:-1]] * np.exp(rng.normal(0, 0.005, n))
+            spread = np.abs(rng.normal(0, 0.01, n))
+            bars = pd.DataFrame({'Open'        : open_,
+                                 'High'        : np.maximum(open_, close) * (1 + spread),
+                                 'Low'         : np.minimum(open_, close) * (1 - spread),
+                                 'Close'       : close,
+                                 'Volume'      : rng.integers(100000, 50000000, n),
+                                 'Dividends'   : 0.0,
+                                 'Stock Splits': 0.0}, index = dates)
+        with self._lock:
+            self._generated[symbol] = bars
+        return bars
+
+    def _minute_bars(self, symbol, day):
+        ## a brownian bridge from the day's open to its close over the 390 regular-session minutes
+        bar   = self._daily_bars(symbol).loc[day]
+        rng   = np.random.default_rng(self._seed(symbol, day.strftime("%Y-%m-%d")))
+        index = pd.date_range(day + pd.Timedelta(hours=9, minutes=30), periods=390, freq='min', name='Datetime')
+        walk  = rng.normal(0, bar['Close']*0.0008, 390).cumsum()
+        close = np.linspace(bar['Open'], bar['Close'], 390) + walk - np.linspace(0, 1, 390)*walk[-1]
+        open_ = np.r_[bar['Open'], close[:-1]]
+        noise = np.abs(rng.normal(0, bar['Close']*0.0003, 390))
+        bars = pd.DataFrame({'Open'        : open_,
+                             'High'        : np.maximum(open_, close) + noise,
+                             'Low'         : np.minimum(open_, close) - noise,
+                             'Close'       : close,
+                             'Volume'      : rng.integers(1000, 500000, 390),
+                             'Dividends'   : 0.0,
+                             'Stock Splits': 0.0}, index = index)
+        return bars[bars.index <= pd.Timestamp.now(tz=MARKET_TZ)]
+
+    def history(self, symbol, start=None, end=None, interval="1d", period=None):
+        symbol = symbol.upper()
+        start, end = _period_bounds(start, end, period)
+        recorded = self._read_bars(symbol, interval)
+        if recorded is not None:
+            return recorded[(recorded.index >= start) & (recorded.index < end)]
+        if not self._known(symbol) or interval not in ("1d", "1m"):
+            return pd.DataFrame()
+        daily = self._daily_bars(symbol)
+        daily = daily[(daily.index >= start.normalize()) & (daily.index < end)]
+        if interval == "1d":
+            return daily
+        frames = [self._minute_bars(symbol, day) for day in daily.index]
+        bars = pd.concat(frames) if frames else pd.DataFrame()
+        return bars[(bars.index >= start) & (bars.index < end)] if frames else bars
+
+    def info(self, symbol):
+        symbol = symbol.upper()
+        path = self._path(symbol, 'info.json')
+        if os.path.exists(path):
+            with open(path) as f:
+                return json.load(f)
+        if not self._known(symbol):
+            raise KeyError('no fixture info for %s' % symbol)
+        names = self.ticker_universe().set_index('Symbol')['Name']
+        name  = names.get(symbol, symbol)
+        rng   = np.random.default_rng(self._seed(symbol, 'info'))
+        daily = self._daily_bars(symbol)
+        last_year = daily['Close'].iloc[-250:]
+        shares = int(rng.integers(10**8, 10**10))
+        return {'symbol'                       : symbol,
+                'shortName'                    : name,
+                'longName'                     : name,
+                'sector'                       : 'Technology',
+                'industry'                     : 'Software',
+                'currency'                     : 'USD',
+                'financialCurrency'            : 'USD',
+                'marketCap'                    : int(shares * daily['Close'].iloc[-1]),
+                'fiftyTwoWeekHigh'             : float(last_year.max()),
+                'fiftyTwoWeekLow'              : float(last_year.min()),
+                'regularMarketPreviousClose'   : float(daily['Close'].iloc[-2]),
+                'trailingEps'                  : float(rng.uniform(-2, 12)),
+                'priceToSalesTrailing12Months' : float(rng.uniform(0.5, 20)),
+                'priceToBook'                  : float(rng.uniform(0.5, 40)),
+                'longBusinessSummary'          : '%s is a generated fixture company.' % name}
+
+    def _generated_statements(self, symbol, period):
+        rng = np.random.default_rng(self._seed(symbol, period))
+        freq, count, scale = ('QE', 8, 0.25) if period == 'Quarterly' else ('YE', 4, 1.0)
+        dates   = pd.date_range(end=pd.Timestamp.today().normalize() - pd.Timedelta(days=FILING_LAG_DAYS), periods=count, freq=freq)[::-1]
+        revenue = rng.uniform(1e9, 1e11) * scale * np.exp(rng.normal(0, 0.05, count))
+        cost    = revenue * rng.uniform(0.3, 0.7, count)
+        op_inc  = (revenue - cost) * rng.uniform(0.2, 0.8, count)
+        income = pd.DataFrame({'Total Revenue': revenue, 'Cost Of Revenue': cost, 'Gross Profit': revenue - cost,
+                               'Operating Income': op_inc, 'Net Income': op_inc * rng.uniform(0.6, 0.9, count)}, index = dates)
+        assets  = revenue * rng.uniform(1, 4, count) / scale
+        liab    = assets * rng.uniform(0.3, 0.8, count)
+        cur_liab = liab * rng.uniform(0.2, 0.5, count)
+        balance = pd.DataFrame({'Total Assets': assets, 'Total Liabilities Net Minority Interest': liab,
+                                'Stockholders Equity': assets - liab, 'Cash And Cash Equivalents': assets * rng.uniform(0.05, 0.2, count),
+                                'Current Assets': assets * rng.uniform(0.2, 0.5, count), 'Current Liabilities': cur_liab}, index = dates)
+        op_cash = op_inc * rng.uniform(0.9, 1.4, count)
+        cashflow = pd.DataFrame({'Operating Cash Flow': op_cash, 'Investing Cash Flow': -op_cash * rng.uniform(0.2, 0.8, count),
+                                 'Financing Cash Flow': -op_cash * rng.uniform(0.1, 0.6, count),
+                                 'Capital Expenditure': -op_cash * rng.uniform(0.1, 0.4, count)}, index = dates)
+        return income, balance, cashflow
+
+    def statements(self, symbol):
+        symbol = symbol.upper()
+        if not self._known(symbol):
+            raise KeyError('no fixture statements for %s' % symbol)
+        bundle = {}
+        for period in ['Yearly', 'Quarterly']:
+            paths = [self._path(symbol, '%s_%s.csv' % (period, name)) for name in STATEMENT_FILES]
+            if all(os.path.exists(path) for path in paths):
+                bundle[period] = tuple(pd.read_csv(path, index_col=0, parse_dates=True) for path in paths)
+            else:
+                bundle[period] = self._generated_statements(symbol, period)
+        return bundle
+
+    def quote_page(self, name):
+        path = self._path('quotes', '%s.html' % name.upper())
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                return f.read()
+        daily  = self._daily_bars('^' + name.upper())
+        price, prev = daily['Close'].iloc[-1], daily['Close'].iloc[-2]
+        return ('<html><body><div class="D(ib) Mend(20px)"><span>{:,.2f}</span><span>{:+,.2f} ({:+.2%})</span>'
+                '<span>At close: 4:00PM EDT</span></div></body></html>').format(price, price - prev, price/prev - 1)
+
+    def ticker_universe(self):
+        if self._universe is None:
+            path = self._path('all_tickers.csv')
+            if os.path.exists(path):
+                self._universe = pd.read_csv(path, usecols=["Symbol","Name"])
+            else:
+                self._universe = pd.DataFrame(FIXTURE_UNIVERSE, columns = ["Symbol","Name"])
+        return self._universe.copy()
+
+
+def record_fixtures(symbols, root, source=None, indexes=('IXIC','DJI','GSPC','RUT')):
+    """ Record live data for `symbols` into a FixtureProvider directory """
+    source = source or YahooProvider()
+    os.makedirs(root, exist_ok=True)
+    source.ticker_universe().to_csv(os.path.join(root, 'all_tickers.csv'), index=False)
+    for symbol in symbols:
+        symbol = symbol.upper()
+        os.makedirs(os.path.join(root, symbol), exist_ok=True)
+        with open(os.path.join(root, symbol, 'info.json'), 'w') as f:
+            json.dump(source.info(symbol), f, default=str)
+        source.history(symbol, interval="1d", period='max').to_csv(os.path.join(root, symbol, 'history_1d.csv'))
+        source.history(symbol, interval="1m", period='5d').to_csv(os.path.join(root, symbol, 'history_1m.csv'))
+        for period, frames in source.statements(symbol).items():
+            for name, frame in zip(STATEMENT_FILES, frames):
+                frame.to_csv(os.path.join(root, symbol, '%s_%s.csv' % (period, name)))
+    os.makedirs(os.path.join(root, 'quotes'), exist_ok=True)
+    for name in indexes:
+        with open(os.path.join(root, 'quotes', '%s.html' % name), 'w', encoding='utf-8') as f:
+            f.write(source.quote_page(name))
+
+
+def make_provider(name=None):
+    name = (name or os.environ.get('LAZYMAN_PROVIDER', 'yahoo')).lower()
+    if name == 'fixture':
+        return FixtureProvider(os.environ.get('LAZYMAN_FIXTURE_DIR',
+                                              os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')))
+    return YahooProvider()
+
+provider = make_provider()
+
+def set_provider(new_provider):
+    ## swap the data source at runtime, e.g. a FixtureProvider for benchmarks
+    global provider
+    provider = new_provider
+    info_cache.clear()
+    fundamentals_cache.clear()
+    ## caches defined further down whose keys do not name the provider
+    chart_frames.clear()
+    live_indicator_state.clear()
+    scan_cache.clear()
+    with _price_matrix_lock:
+        _price_matrix['folder'], _price_matrix['matrix'] = None, None
+
+
+## Shared Caches
+
+class PendingFetch:
+    """ One upstream fetch in flight; callbacks missing the same key wait on it and share its outcome """
+    def __init__(self):
+        self.done  = threading.Event()
+        self.value = None
+        self.error = None
+
+class TTLCache:
+    """ Thread-safe LRU cache whose entries expire after a per-entry ttl (in seconds).
+    Concurrent misses on the same key wait for a single fetch instead of all going upstream. """
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._pending = {}   # key -> PendingFetch of the callback fetching it
+
+    def _lookup(self, key, now):
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires, value = entry
+        if now >= expires:
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return entry
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._lookup(key, time.time())
+        return default if entry is None else entry[1]
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._data[key] = (time.time() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def get_or_fetch(self, key, fetch, ttl):
+        ## ttl is either a number of seconds or a function of the fetched value
+        with self._lock:
+            entry = self._lookup(key, time.time())
+            if entry is not None:
+                return entry[1]
+            pending = self._pending.get(key)
+            owner = pending is None
+            if owner:
+                pending = self._pending[key] = PendingFetch()
+        if not owner:
+            ## a failed fetch fails its waiters too, so an upstream outage still costs one request per key
+            pending.done.wait()
+            if pending.error is not None:
+                raise pending.error
+            return pending.value
+        try:
+            pending.value = fetch()
+            self.set(key, pending.value, ttl(pending.value) if callable(ttl) else ttl)
+            return pending.value
+        except BaseException as error:
+            pending.error = error
+            raise
+        finally:
+            ## only the fetching callback retires its own entry, never a newer fetch's
+            with self._lock:
+                if self._pending.get(key) is pending:
+                    del self._pending[key]
+            pending.done.set()
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+## one `ticker.info` per symbol shared by get_info, fundamentals_prep, update_chart and stock_live_chart
+INFO_CACHE_TTL     = int(os.environ.get('LAZYMAN_INFO_CACHE_TTL', 15*60))   # in seconds
+INFO_CACHE_MAXSIZE = int(os.environ.get('LAZYMAN_INFO_CACHE_MAXSIZE', 512))
+
+info_cache = TTLCache(INFO_CACHE_MAXSIZE)
+
+def get_ticker_info(symbol):
+    symbol = symbol.upper()
+    return info_cache.get_or_fetch(symbol, lambda: provider.info(symbol), INFO_CACHE_TTL)
 
 
 def get_info(ticker):
     try:
         ## Company Information & Company Description
-        ticker = yf.Ticker(ticker)
-        company_overview = ticker.info
+        company_overview = get_ticker_info(ticker)
 
         def get_peratio():
             if company_overview['trailingEps'] is None:
@@ -90,18 +511,292 @@ def get_info(ticker):
         return company_info, company_desc
 
 
+## one statements bundle per ticker holding both the Yearly and the Quarterly view;
+## statements change at most once a quarter so entries live until the next filing is due
+FUNDAMENTALS_CACHE_MAXSIZE = int(os.environ.get('LAZYMAN_FUNDAMENTALS_CACHE_MAXSIZE', 256))
+FILING_LAG_DAYS            = 45         # days between a fiscal period end and its filing
+FUNDAMENTALS_MIN_TTL       = 6*60*60    # recheck an overdue filing at most every 6 hours
+
+fundamentals_cache = TTLCache(FUNDAMENTALS_CACHE_MAXSIZE)
+
+def fundamentals_bundle_ttl(bundle):
+    ## the next statement is expected one quarter plus the filing lag after the latest quarter end
+    periods = bundle['Quarterly'][0].index
+    if len(periods) == 0:
+        return FUNDAMENTALS_MIN_TTL
+    next_filing = pd.Timestamp(periods.max()) + pd.DateOffset(months=3) + pd.Timedelta(days=FILING_LAG_DAYS)
+    return max((next_filing - pd.Timestamp.now()).total_seconds(), FUNDAMENTALS_MIN_TTL)
+
+def get_fundamentals_bundle(symbol):
+    symbol = symbol.upper()
+    return fundamentals_cache.get_or_fetch(symbol, lambda: provider.statements(symbol), fundamentals_bundle_ttl)
+
+def statements_version(frames):
+    ## content hash of one period's (income, balance, cashflow) statements
+    return tuple(0 if frame.empty else int(pd.util.hash_pandas_object(frame).sum()) for frame in frames)
+
+
+## Serialized Figure Cache
+## finished figures kept as JSON-native dicts under (kind, ticker, view, data version); a hit skips building
+## the figure and plotly's validation and array encoding, leaving Dash a plain json dump of the payload
+FIGURE_CACHE_TTL     = int(os.environ.get('LAZYMAN_FIGURE_CACHE_TTL', 60*60))
+FIGURE_CACHE_MAXSIZE = int(os.environ.get('LAZYMAN_FIGURE_CACHE_MAXSIZE', 512))
+
+figure_cache = TTLCache(FIGURE_CACHE_MAXSIZE)
+
+def cached_figure(key, build):
+    return figure_cache.get_or_fetch(key, lambda: json.loads(pio.to_json(build(), validate=False)), FIGURE_CACHE_TTL)
+
+
+## Local Daily Bars Store
+## daily OHLCV per symbol on disk; a request only goes upstream for the dates not stored yet
+DATA_DIR = os.environ.get('LAZYMAN_DATA_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data'))
+
+try:
+    import pyarrow  # Parquet engine for the bar store
+    BARS_FORMAT = 'parquet'
+except ImportError:
+    BARS_FORMAT = 'pickle'
+
+def adjustment_events(frames):
+    ## True when any of the fetched daily frames holds a split or a dividend
+    return any(frame.get(column, pd.Series(dtype=float)).fillna(0).ne(0).any()
+               for frame in frames for column in ['Stock Splits', 'Dividends'])
+
+class OHLCVStore:
+    """ Per-symbol daily bars plus the [start, end) date range already fetched for it """
+    def __init__(self, root):
+        self.root = root
+        self._locks = {}
+        self._locks_lock = threading.Lock()
+
+    def _lock(self, symbol):
+        with self._locks_lock:
+            return self._locks.setdefault(symbol, threading.Lock())
+
+    def _paths(self, symbol):
+        ## keep data from different providers apart, e.g. fixture bars never mix with live ones
+        folder = os.path.join(self.root, provider.name)
+        return os.path.join(folder, '%s.%s' % (symbol, BARS_FORMAT)), os.path.join(folder, '%s.json' % symbol)
+
+    def load(self, symbol):
+        bars_path, meta_path = self._paths(symbol)
+        if not (os.path.exists(bars_path) and os.path.exists(meta_path)):
+            return pd.DataFrame(), None
+        with open(meta_path) as f:
+            meta = json.load(f)
+        bars = pd.read_parquet(bars_path) if BARS_FORMAT == 'parquet' else pd.read_pickle(bars_path)
+        return bars, (pd.Timestamp(meta['start']), pd.Timestamp(meta['end']))
+
+    def rebased(self, symbol):
+        """ Unix time of the symbol's last rebase (history replaced after a split or dividend), or None """
+        meta_path = self._paths(symbol.upper())[1]
+        try:
+            with open(meta_path) as f:
+                return json.load(f).get('rebased')
+        except:
+            return None
+
+    def save(self, symbol, bars, coverage, rebased=None):
+        bars_path, meta_path = self._paths(symbol)
+        os.makedirs(os.path.dirname(bars_path), exist_ok=True)
+        ## write to temp files and swap them in, so concurrent readers never see a partial file
+        if BARS_FORMAT == 'parquet':
+            bars.to_parquet(bars_path + '.tmp')
+        else:
+            bars.to_pickle(bars_path + '.tmp')
+        with open(meta_path + '.tmp', 'w') as f:
+            json.dump({'start': coverage[0].strftime("%Y-%m-%d"), 'end': coverage[1].strftime("%Y-%m-%d"),
+                       'rebased': rebased}, f)
+        os.replace(bars_path + '.tmp', bars_path)
+        os.replace(meta_path + '.tmp', meta_path)
+
+    def history(self, symbol, start, end):
+        """ Daily bars for start <= date < end ('YYYY-MM-DD'), fetching only the missing ranges """
+        symbol = symbol.upper()
+        start, end = pd.Timestamp(start), pd.Timestamp(end)
+        ## today's bar is still forming, so today never counts as stored
+        today = pd.Timestamp.now(tz=MARKET_TZ).tz_localize(None).normalize()
+        with self._lock(symbol):
+            bars, coverage = self.load(symbol)
+            if coverage is None:
+                missing = [(start, end)]
+            else:
+                missing = []
+                if start < coverage[0]:
+                    missing.append((start, coverage[0]))
+                if end > coverage[1]:
+                    missing.append((coverage[1], end))
+            fetched, covered, fetched_end, rebased = [], coverage, None, False
+            for a, b in missing:
+                frame = provider.history(symbol, start=a.strftime("%Y-%m-%d"), end=b.strftime("%Y-%m-%d"), interval="1d")
+                ## yfinance returns an empty frame on network errors too, so an empty range is
+                ## never marked as stored; it is simply asked for again next time
+                if frame.empty:
+                    continue
+                fetched.append(frame)
+                fetched_end = max(b, fetched_end) if fetched_end is not None else b
+                covered = (min(a, covered[0]) if covered else a, max(min(b, today), covered[1]) if covered else min(b, today))
+            if fetched and coverage is not None and adjustment_events(fetched):
+                ## a split or dividend re-bases the adjusted prices of every earlier bar, so the stored
+                ## history is replaced rather than extended with bars on a different basis; the refetch runs
+                ## to the end actually requested, so today's forming bar (never part of coverage) is kept
+                full = provider.history(symbol, start=covered[0].strftime("%Y-%m-%d"),
+                                        end=max(covered[1], fetched_end).strftime("%Y-%m-%d"), interval="1d")
+                fetched, bars, rebased = ([full], pd.DataFrame(), True) if not full.empty else ([], bars, False)
+            if fetched:
+                bars = pd.concat([bars] + fetched) if not bars.empty else pd.concat(fetched)
+                bars = bars[~bars.index.duplicated(keep='last')].sort_index()
+                coverage = covered
+                ## the rebase time tells copies of the old bars (the price matrix) that they are stale
+                self.save(symbol, bars, coverage, time.time() if rebased else self.rebased(symbol))
+        if bars.empty:
+            return bars
+        days = bars.index.tz_localize(None).normalize()
+        return bars[(days >= start) & (days < end)]
+
+ohlcv_store = OHLCVStore(os.path.join(DATA_DIR, 'ohlcv'))
+
+
+## Memory-Mapped Price Matrix
+## daily OHLCV of the whole universe in one (field, symbol, date) array on disk; every worker process
+## maps the same file, so the OS page cache holds one copy and slices are zero-copy views
+MATRIX_FIELDS   = ['Open', 'High', 'Low', 'Close', 'Volume']
+MATRIX_CALENDAR = '^GSPC'   # its trading days are the matrix date axis
+
+class PriceMatrix:
+    """ Read-only view over a matrix folder written by `build_price_matrix` """
+    def __init__(self, folder):
+        self.folder  = folder
+        self.dates   = np.load(os.path.join(folder, 'dates.npy'))
+        with open(os.path.join(folder, 'symbols.json')) as f:
+            self.symbols = json.load(f)
+        self.index   = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.values  = np.load(os.path.join(folder, 'ohlcv.npy'), mmap_mode='r')
+        try:
+            with open(os.path.join(folder, 'meta.json')) as f:
+                self.built = json.load(f)['built']
+        except:
+            ## dates.npy is the first file a build writes
+            self.built = os.path.getmtime(os.path.join(folder, 'dates.npy'))
+        self.end     = pd.Timestamp(self.dates[-1]) + pd.Timedelta(days=1) if len(self.dates) else None
+
+    def __contains__(self, symbol):
+        return symbol in self.index
+
+    def window(self, symbol, start, end):
+        """ (dates, values) views for start <= date < end, values shaped (field, date) """
+        a, b = np.searchsorted(self.dates, [np.datetime64(start, 'D'), np.datetime64(end, 'D')])
+        return self.dates[a:b], self.values[:, self.index[symbol], a:b]
+
+    def frame(self, symbol, start, end):
+        dates, values = self.window(symbol, start, end)
+        index = pd.DatetimeIndex(dates, name='Date').tz_localize(MARKET_TZ)
+        df = pd.DataFrame(values.T, index = index, columns = MATRIX_FIELDS, copy = False)
+        ## days before a listing (or after a delisting) are NaN in the matrix
+        if np.isnan(values[3]).any():
+            df = df[~np.isnan(values[3])]
+        return df
+
+
+def build_price_matrix(symbols=None, start='2000-01-01', end=None, root=None):
+    """ Write the daily bars of `symbols` (default: the whole universe) from the bar store into a new matrix version.
+
+    The matrix stops before today's date (end is exclusive and capped at today).
+    """
+    symbols = list(all_lists['Symbol']) if symbols is None else [symbol.upper() for symbol in symbols]
+    ## completed sessions only: today's bar may still be forming, so it is left to the bar store (see daily_history)
+    today   = pd.Timestamp.now(tz=MARKET_TZ).tz_localize(None).normalize()
+    end     = min(pd.Timestamp(end), today).strftime("%Y-%m-%d") if end else today.strftime("%Y-%m-%d")
+    root    = root or os.path.join(DATA_DIR, 'matrix', provider.name)
+
+    calendar = ohlcv_store.history(MATRIX_CALENDAR, start, end)
+    dates    = calendar.index.tz_localize(None).normalize().values.astype('datetime64[D]')
+    folder   = os.path.join(root, time.strftime('%Y%m%d-%H%M%S'))
+    os.makedirs(folder)
+    ## bars rebased in the store after this moment may not be on the matrix's price basis
+    with open(os.path.join(folder, 'meta.json'), 'w') as f:
+        json.dump({'built': time.time()}, f)
+    np.save(os.path.join(folder, 'dates.npy'), dates)
+    values = np.lib.format.open_memmap(os.path.join(folder, 'ohlcv.npy'), mode='w+', dtype='float64',
+                                       shape=(len(MATRIX_FIELDS), len(symbols), len(dates)))
+    values[:] = np.nan
+
+    ## fill one symbol at a time so memory stays bounded by a single history
+    def fill(i):
+        bars = ohlcv_store.history(symbols[i], start, end)
+        if bars.empty:
+            return
+        days = bars.index.tz_localize(None).normalize().values.astype('datetime64[D]')
+        pos  = np.searchsorted(dates, days)
+        keep = (pos < len(dates)) & (dates[np.minimum(pos, len(dates) - 1)] == days)
+        values[:, i, pos[keep]] = bars[MATRIX_FIELDS].to_numpy(dtype='float64')[keep].T
+
+    with ThreadPoolExecutor(max_workers = 8) as executor:
+        for _ in executor.map(fill, range(len(symbols))):
+            pass
+    values.flush()
+    del values
+    with open(os.path.join(folder, 'symbols.json'), 'w') as f:
+        json.dump(symbols, f)
+    ## readers switch to the new version through the CURRENT pointer; old mappings stay valid
+    with open(os.path.join(root, 'CURRENT.tmp'), 'w') as f:
+        f.write(os.path.basename(folder))
+    os.replace(os.path.join(root, 'CURRENT.tmp'), os.path.join(root, 'CURRENT'))
+    return folder
+
+_price_matrix = {'folder': None, 'matrix': None}
+_price_matrix_lock = threading.Lock()
+
+def get_price_matrix():
+    root = os.path.join(DATA_DIR, 'matrix', provider.name)
+    try:
+        with open(os.path.join(root, 'CURRENT')) as f:
+            folder = os.path.join(root, f.read().strip())
+    except OSError:
+        return None
+    with _price_matrix_lock:
+        if _price_matrix['folder'] != folder:
+            _price_matrix['matrix'], _price_matrix['folder'] = PriceMatrix(folder), folder
+        return _price_matrix['matrix']
+
+def daily_history(symbol, start, end):
+    """ Daily OHLCV for start <= date < end: matrix views where it covers, the bar store for the rest.
+
+    A symbol rebased by a split or dividend since the matrix build is served from the bar store alone,
+    so old- and new-basis prices are never joined.
+    """
+    symbol = symbol.upper()
+    matrix = get_price_matrix()
+    if matrix is None or symbol not in matrix or matrix.end is None:
+        return ohlcv_store.history(symbol, start, end)
+    rebased = ohlcv_store.rebased(symbol)
+    if rebased is not None and rebased > matrix.built:
+        return ohlcv_store.history(symbol, start, end)
+    start, end = pd.Timestamp(start), pd.Timestamp(end)
+    if end <= matrix.end:
+        return matrix.frame(symbol, start, end)
+    ## the tail starts at the matrix's last date, whose close in both sources must agree
+    last = matrix.end - pd.Timedelta(days=1)
+    tail = ohlcv_store.history(symbol, min(max(start, matrix.end), last).strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d"))
+    last_close = matrix.values[3, matrix.index[symbol], -1]
+    if len(tail) and tail.index[0].tz_localize(None).normalize() == last:
+        if last_close == last_close and not np.isclose(tail['Close'].iloc[0], last_close, rtol=1e-6):
+            return ohlcv_store.history(symbol, start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d"))
+        tail = tail.iloc[1:]
+    if start >= matrix.end:
+        return tail[tail.index.tz_localize(None).normalize() >= start]
+    head = matrix.frame(symbol, start, matrix.end)
+    return pd.concat([head, tail[MATRIX_FIELDS]]) if not tail.empty else head
+
+
 def fundamentals_prep(ticker, period):
     try:
         ## Starting Tables
-        ticker = yf.Ticker(ticker)
-        if period == 'Yearly':
-            income_statement = ticker.incomestmt.transpose()
-            balance_sheet    = ticker.balancesheet.transpose()
-            cash_flow        = ticker.cashflow.transpose()
-        elif period == 'Quarterly':
-            income_statement = ticker.quarterly_incomestmt.transpose()
-            balance_sheet    = ticker.quarterly_balancesheet.transpose()
-            cash_flow        = ticker.quarterly_cashflow.transpose()
+        symbol = ticker
+        bundle = get_fundamentals_bundle(symbol)
+        if period in bundle:
+            income_statement, balance_sheet, cash_flow = bundle[period]
         else:
             income_statement,balance_sheet,cash_flow = pd.DataFrame(), pd.DataFrame(), pd.DataFrame()
 
@@ -114,7 +809,7 @@ def fundamentals_prep(ticker, period):
         cash_flow['fiscalDateEnding']        = cash_flow['fiscalDateEnding'].dt.strftime('%Y-%m-%d')
 
         ## Querry the Currency Unit
-        currency = ticker.info['financialCurrency']
+        currency = get_ticker_info(symbol)['financialCurrency']
 
         ## Convert all None value to '0'
         income_statement = income_statement.fillna(value = 0)
@@ -164,6 +859,47 @@ def fundamentals_prep(ticker, period):
     except:
         return pd.DataFrame(), pd.DataFrame(), pd.DataFrame(), ''
 
+## KPI labels and display kinds, in the column order fundamentals_prep gives each statement
+INCOME_KPIS  = [('Total Revenue', 'amount'), ('Cost Of Revenue', 'amount'), ('Gross Profit', 'amount'),
+                ('Operating Income', 'amount'), ('Net Income', 'amount'),
+                ('Gross Margin', 'percent'), ('Operating Margin', 'percent'), ('Net Profit Margin', 'percent')]
+BALANCE_KPIS = [('Total Assets', 'amount'), ('Total Liabilities', 'amount'), ('Total Shareholder Equity', 'amount'),
+                ('Cash And Cash Equivalents', 'amount'), ('Total Current Assets', 'amount'), ('Total Current Liabilities', 'amount'),
+                ('Cash Ratio', 'ratio'), ('Current Ratio', 'ratio')]
+CASHFLOW_KPIS = [('Operating Cash flow', 'amount'), ('Cash Flow From Investment', 'amount'), ('Cash Flow From Financing', 'amount'),
+                 ('Capital Expenditures', 'amount'), ('Free Cash Flow', 'amount'),
+                 ('Operating Cash Flow/Sales Ratio', 'ratio')]
+
+KPI_MILLIONS = 100000000   # amounts above this are shown in millions
+
+def format_kpis(frame, kinds):
+    """ Display strings for a numeric frame (rows are periods or tickers), one kind per column:
+
+    'amount'  -> 1,234 or 1,234 M above KPI_MILLIONS
+    'percent' -> 12.3%
+    'ratio'   -> 1.23
+    """
+    out = {}
+    for column, kind in zip(frame.columns, kinds):
+        values = frame[column].to_numpy(dtype=float)
+        if kind == 'amount':
+            millions = np.abs(values) > KPI_MILLIONS
+            rounded  = np.rint(np.where(millions, values / 1000000, values)) + 0.0
+            out[column] = [(format(int(v), ',') + (' M' if m else '')) if v == v else 'N/A'
+                           for v, m in zip(rounded.tolist(), millions.tolist())]
+        else:
+            scale, digits, pattern = (100, 1, "{:.1%}") if kind == 'percent' else (1, 2, "{:.2f}")
+            ## values that round to zero print as 0, never -0
+            values = np.where(np.round(values * scale, digits) == 0, 0.0, values)
+            out[column] = [pattern.format(v) if v == v else 'N/A' for v in values.tolist()]
+    return pd.DataFrame(out, index = frame.index, columns = frame.columns)
+
+def kpi_table(statement, kpis):
+    ## the latest period of a statement as a KPI/Value table
+    latest = statement.iloc[:1, 1:]
+    values = format_kpis(latest, [kind for _, kind in kpis])
+    return pd.DataFrame({'KPI': [label for label, _ in kpis], 'Value': values.iloc[0].to_numpy(dtype=object)})
+
 def fundamentals_tables(ticker, period):
 
     IncomeStatement, BalanceSheet, CashFlow, currency = fundamentals_prep(ticker, period)
@@ -173,56 +909,38 @@ def fundamentals_tables(ticker, period):
         df1 = df2 = df3 = pd.DataFrame()
 
     else:
-        df1 = pd.DataFrame(columns=['KPI','Value'])
-        last_incomestatement = IncomeStatement.iloc[0][1:]
-        for key, value in enumerate(last_incomestatement):
-            if key<=4 and abs(value) > 100000000:
-                value_conv = format(int("%.0f" % (value/1000000)),',') + ' M'
-            elif key<=4 and abs(value) <= 100000000:
-                value_conv = format(int("%.0f" % value),',')
-            else:
-                value_conv = "{:.1%}".format(value)
-            row = {'KPI':last_incomestatement.index[key],'Value':value_conv}
-            df1 = pd.concat([df1,pd.DataFrame([row])], ignore_index = True)
-        df1['KPI'] = ['Total Revenue','Cost Of Revenue','Gross Profit','Operating Income','Net Income','Gross Margin','Operating Margin','Net Profit Margin']
-
-        df2 = pd.DataFrame(columns=['KPI','Value'])
-        last_balancesheet = BalanceSheet.iloc[0][1:]
-        for key, value in enumerate(last_balancesheet):
-            if key<=5 and abs(value) > 100000000:
-                value_conv = format(int("%.0f" % (value/1000000)),',') + ' M'
-            elif key<=5 and abs(value) <= 100000000:
-                value_conv = format(int("%.0f" % value),',')
-            else:
-                value_conv = "%.2f" % value
-            row = {'KPI':last_balancesheet.index[key],'Value':value_conv}
-            df2 = pd.concat([df2,pd.DataFrame([row])], ignore_index = True)
-        df2['KPI'] = ['Total Assets','Total Liabilities','Total Shareholder Equity','Cash And Cash Equivalents','Total Current Assets','Total Current Liabilities','Cash Ratio','Current Ratio']
-
-        df3 = pd.DataFrame(columns=['KPI','Value'])
-        last_cashflow = CashFlow.iloc[0][1:]
-        for key, value in enumerate(last_cashflow):
-            if key<=4 and abs(value) > 100000000:
-                value_conv = format(int("%.0f" % (value/1000000)),',') + ' M'
-            elif key<=4 and abs(value) <= 100000000:
-                value_conv = format(int("%.0f" % value),',')
-            else:
-                value_conv = "%.2f" % value
-            row = {'KPI':last_cashflow.index[key],'Value':value_conv}
-            df3 = pd.concat([df3,pd.DataFrame([row])], ignore_index = True)
-        df3['KPI'] = ['Operating Cash flow','Cash Flow From Investment','Cash Flow From Financing','Capital Expenditures','Free Cash Flow','Operating Cash Flow/Sales Ratio']
+        df1 = kpi_table(IncomeStatement, INCOME_KPIS)
+        df2 = kpi_table(BalanceSheet, BALANCE_KPIS)
+        df3 = kpi_table(CashFlow, CASHFLOW_KPIS)
 
     return IncomeStatement, BalanceSheet, CashFlow, df1, df2, df3, currency
 
 def make_dash_table(df):
     """ Return a dash definition of an HTML table for a Pandas dataframe """
-    table = []
-    for index, row in df.iterrows():
-        html_row = []
-        for i in range(len(row)):
-            html_row.append(html.Td([row[i]]))
-        table.append(html.Tr(html_row))
-    return table
+    return [html.Tr([html.Td(cell) for cell in row]) for row in df.to_numpy(dtype=object).tolist()]
+
+## frames longer than this are sent column-oriented and shown in a paginated DataTable
+TABLE_HTML_MAX_ROWS = 50
+TABLE_PAGE_SIZE     = 25
+
+def render_table(df, key=None, header=False):
+    """ An html.Table for small frames; large ones ship their columns once in a dcc.Store and a clientside
+    callback turns them into the rows of a natively paginated DataTable, so only one page is ever in the DOM """
+    if len(df) <= TABLE_HTML_MAX_ROWS:
+        head = [html.Tr([html.Th(str(name)) for name in df.columns])] if header else []
+        return html.Table(head + make_dash_table(df))
+    key = key or uuid.uuid4().hex[:12]
+    columns = {str(i): df[name].tolist() for i, name in enumerate(df.columns)}
+    return html.Div([
+        dcc.Store(id = {'type': 'table-columns', 'index': key}, data = columns),
+        dash_table.DataTable(id = {'type': 'table', 'index': key},
+                             columns = [{'name': str(name), 'id': str(i)} for i, name in enumerate(df.columns)],
+                             page_action = 'native',
+                             page_size = TABLE_PAGE_SIZE,
+                             style_as_list_view = True,
+                             style_cell = {'font-family': 'Raleway', 'textAlign': 'left'},
+                             style_header = {'font-weight': 'bold'}),
+    ])
 
 
 ## Figures Part
@@ -628,76 +1346,511 @@ def cashflow_line(df):
     }
 
 
+## Peer Comparison
+## statements for up to PEER_MAX_SYMBOLS tickers are fetched side by side, so the page waits about as
+## long as the slowest single ticker; the metrics for all of them are then computed in one frame
+PEER_MAX_SYMBOLS = 20
+PEER_WORKERS     = int(os.environ.get('LAZYMAN_PEER_WORKERS', PEER_MAX_SYMBOLS))
+
+_peer_executor = ThreadPoolExecutor(max_workers=PEER_WORKERS, thread_name_prefix='peer-fetch')
+
+## statement line items the peer metrics need: (statement position in the bundle, line item)
+PEER_ITEMS = {'Total Revenue'       : (0, 'Total Revenue'),
+              'Gross Profit'        : (0, 'Gross Profit'),
+              'Operating Income'    : (0, 'Operating Income'),
+              'Net Income'          : (0, 'Net Income'),
+              'Cash'                : (1, 'Cash And Cash Equivalents'),
+              'Current Assets'      : (1, 'Current Assets'),
+              'Current Liabilities' : (1, 'Current Liabilities'),
+              'Operating Cash Flow' : (2, 'Operating Cash Flow'),
+              'Capital Expenditure' : (2, 'Capital Expenditure')}
+
+PEER_KPIS = [('Gross Margin', 'percent'), ('Operating Margin', 'percent'), ('Net Profit Margin', 'percent'),
+             ('Cash Ratio', 'ratio'), ('Current Ratio', 'ratio'), ('Free Cash Flow', 'amount')]
+
+def parse_symbols(text):
+    ## 'aapl, msft googl' -> ['AAPL', 'MSFT', 'GOOGL'], de-duplicated and capped at PEER_MAX_SYMBOLS
+    symbols = [symbol.upper() for symbol in re.split(r'[\s,;]+', text or '') if symbol]
+    return list(dict.fromkeys(symbols))[:PEER_MAX_SYMBOLS]
+
+def latest_statement_items(symbol, period):
+    ## the latest period's PEER_ITEMS for one ticker; None when its statements cannot be fetched
+    try:
+        statements = get_fundamentals_bundle(symbol)[period]
+    except:
+        return None
+    row = {}
+    for name, (position, item) in PEER_ITEMS.items():
+        statement = statements[position]
+        row[name] = statement[item].iloc[0] if item in statement.columns and len(statement) else np.nan
+    return row
+
+def peer_metrics(symbols, period='Yearly'):
+    """ One row per ticker with its margins, cash and current ratios and free cash flow for the latest period """
+    rows = dict(zip(symbols, _peer_executor.map(lambda symbol: latest_statement_items(symbol, period), symbols)))
+    return statement_metrics(pd.DataFrame.from_dict({symbol: row for symbol, row in rows.items() if row is not None},
+                                                    orient = 'index', columns = list(PEER_ITEMS)))
+
+def statement_metrics(items):
+    ## PEER_ITEMS per ticker -> the derived metrics, computed for every row at once
+    items = items.astype(float)
+    revenue = items['Total Revenue'].where(items['Total Revenue'] != 0)
+    current_liabilities = items['Current Liabilities'].where(items['Current Liabilities'] != 0)
+    metrics = pd.DataFrame({'Gross Margin'      : items['Gross Profit'] / revenue,
+                            'Operating Margin'  : items['Operating Income'] / revenue,
+                            'Net Profit Margin' : items['Net Income'] / revenue,
+                            'Cash Ratio'        : items['Cash'] / current_liabilities,
+                            'Current Ratio'     : items['Current Assets'] / current_liabilities,
+                            'Free Cash Flow'    : items['Operating Cash Flow'] + items['Capital Expenditure']},
+                           index = items.index)
+    metrics.index.name = 'Symbol'
+    return metrics
+
+def peer_bar(metrics, columns, colors, tickformat=None):
+    return {
+        'data': [go.Bar(
+            x=metrics.index,
+            y=metrics[column],
+            marker={
+                "color": color,
+                "line": {
+                    "color": "rgb(255, 255, 255)",
+                    "width": 2,
+                },
+            },
+            name=column
+        ) for column, color in zip(columns, colors)],
+        "layout": go.Layout(
+            autosize=True,
+            bargap=0.35,
+            font={"family": "Raleway", "size": 10},
+            height=300,
+            legend={
+                "x": -0.09,
+                "y": -0.19,
+                "orientation": "h",
+                "yanchor": "top",
+                "font": {"size": 13}
+            },
+            margin={
+                "r": 0,
+                "t": 20,
+                "b": 10,
+                "l": 10,
+            },
+            showlegend=True,
+            title="",
+            hovermode="closest",
+            xaxis={
+                "autorange": True,
+                "showline": True,
+                "title": "",
+                "type": "category",
+            },
+            yaxis={
+                "autorange": True,
+                "showgrid": True,
+                "showline": True,
+                "title": "",
+                "type": "linear",
+                "zeroline": True,
+                "zerolinecolor": "Grey",
+                "tickformat": tickformat,
+            },
+        )
+    }
+
+
+## Fundamentals Screener
+## a nightly job (`python lazyman_stock_research.py --build-screener`) computes the valuation and statement
+## ratios of the whole universe into one table; the page answers filters and sorts from its column arrays
+SCREENER_METRICS = [('P/E', 'ratio'), ('P/S', 'ratio'), ('P/B', 'ratio')] + PEER_KPIS
+SCREENER_CHUNK_SIZE   = 50     # symbols per checkpointed chunk
+SCREENER_RESULT_LIMIT = 1000   # rows sent to the page
+
+def screener_path():
+    return os.path.join(DATA_DIR, 'screener', '%s.%s' % (provider.name, BARS_FORMAT))
+
+def write_frame(df, path):
+    ## atomic write in the bar store format, so readers never see half a file
+    if BARS_FORMAT == 'parquet':
+        df.to_parquet(path + '.tmp')
+    else:
+        df.to_pickle(path + '.tmp')
+    os.replace(path + '.tmp', path)
+
+def read_frame(path):
+    return pd.read_parquet(path) if BARS_FORMAT == 'parquet' else pd.read_pickle(path)
+
+def info_ratios(symbol):
+    ## P/E, P/S and P/B as get_info derives them; NaN where a ratio is not meaningful
+    info = get_ticker_info(symbol)
+    eps, close = info.get('trailingEps'), info.get('regularMarketPreviousClose')
+    return {'P/E': close / eps if eps and close and eps > 0 else np.nan,
+            'P/S': info.get('priceToSalesTrailing12Months') if info.get('priceToSalesTrailing12Months') is not None else np.nan,
+            'P/B': info.get('priceToBook') if info.get('priceToBook') is not None else np.nan}
+
+def screener_chunk(symbols):
+    """ Screener rows for one chunk of symbols; runs in a worker process """
+    items, ratios = {}, {}
+    for symbol in symbols:
+        row = latest_statement_items(symbol, 'Yearly')
+        items[symbol] = row if row is not None else {}
+        try:
+            ratios[symbol] = info_ratios(symbol)
+        except:
+            ratios[symbol] = {}
+    metrics = statement_metrics(pd.DataFrame.from_dict(items, orient = 'index', columns = list(PEER_ITEMS)))
+    ratios  = pd.DataFrame.from_dict(ratios, orient = 'index', columns = ['P/E', 'P/S', 'P/B']).astype(float)
+    return pd.concat([ratios, metrics], axis = 1).reindex(symbols).rename_axis('Symbol').reset_index()
+
+def build_screener(symbols=None, chunk_size=SCREENER_CHUNK_SIZE, workers=None):
+    """ Compute the screener table for `symbols` (default: the universe) in a process pool.
+
+    Every finished chunk is saved under the provider's build folder, so an interrupted run of the same request
+    resumes with the missing chunks; the folder is removed once the table is written.
+    """
+    path    = screener_path()
+    folder  = os.path.join(os.path.dirname(path), 'build-%s' % provider.name)
+    symbols = list(all_lists['Symbol']) if symbols is None else [symbol.upper() for symbol in symbols]
+    ## chunk numbers are only valid for the same symbols and chunk size: resume those, start over otherwise
+    request_path = os.path.join(folder, 'request.json')
+    request = {'symbols': symbols, 'chunk_size': chunk_size}
+    try:
+        with open(request_path) as f:
+            resume = json.load(f) == request
+    except:
+        resume = False
+    if not resume:
+        shutil.rmtree(folder, ignore_errors = True)
+        os.makedirs(folder)
+        with open(request_path, 'w') as f:
+            json.dump(request, f)
+    chunks = [symbols[i:i + chunk_size] for i in range(0, len(symbols), chunk_size)]
+    chunk_paths = [os.path.join(folder, 'chunk-%05d.%s' % (i, BARS_FORMAT)) for i in range(len(chunks))]
+    todo = [i for i, chunk_path in enumerate(chunk_paths) if not os.path.exists(chunk_path)]
+
+    with ProcessPoolExecutor(max_workers = workers) as executor:
+        futures = {executor.submit(screener_chunk, chunks[i]): i for i in todo}
+        for done, future in enumerate(as_completed(futures), 1):
+            write_frame(future.result(), chunk_paths[futures[future]])
+            print('screener: %d/%d chunks' % (len(chunks) - len(todo) + done, len(chunks)), flush = True)
+
+    table = pd.concat([read_frame(chunk_path) for chunk_path in chunk_paths], ignore_index = True)
+    names = all_lists.drop_duplicates('Symbol').set_index('Symbol')['Name']
+    table.insert(1, 'Name', table['Symbol'].map(names).fillna(''))
+    write_frame(table, path)
+    shutil.rmtree(folder)
+    return path
+
+class ScreenerTable:
+    """ The screener table as one numpy array per column; queries are boolean masks and one argsort """
+    def __init__(self, table):
+        self.symbols = table['Symbol'].to_numpy(dtype=object)
+        self.names   = table['Name'].to_numpy(dtype=object)
+        self.values  = {column: table[column].to_numpy(dtype=float) for column, _ in SCREENER_METRICS}
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def query(self, ranges=None, sort_by=None, descending=True, limit=SCREENER_RESULT_LIMIT):
+        """ Rows with low <= value <= high for every {column: (low, high)} in ranges (None = open), sorted by one column """
+        mask = np.ones(len(self.symbols), dtype=bool)
+        for column, (low, high) in (ranges or {}).items():
+            values = self.values[column]
+            if low is not None:
+                mask &= values >= low
+            if high is not None:
+                mask &= values <= high
+        rows = np.flatnonzero(mask)
+        if sort_by:
+            key  = self.values[sort_by][rows]
+            ## NaN sorts last either way
+            rows = rows[np.argsort(-key if descending else key, kind='stable')]
+        rows = rows[:limit]
+        result = pd.DataFrame({'Symbol': self.symbols[rows], 'Name': self.names[rows]})
+        for column, _ in SCREENER_METRICS:
+            result[column] = self.values[column][rows]
+        return result, int(mask.sum())
+
+_screener_table = {'key': None, 'table': None}
+_screener_table_lock = threading.Lock()
+
+def get_screener_table():
+    ## reloads only when a new build has replaced the file; None before the first build
+    path = screener_path()
+    try:
+        key = (path, os.stat(path).st_mtime_ns)
+    except OSError:
+        return None
+    with _screener_table_lock:
+        if _screener_table['key'] != key:
+            _screener_table['table'] = ScreenerTable(read_frame(path))
+            _screener_table['key'] = key
+        return _screener_table['table']
+
+
 ## get the tickers and company name lists https://www.nasdaq.com/market-activity/stocks/screener
+## startup reads a local snapshot of the list; the download only happens in the background
+UNIVERSE_MAX_AGE = 24*60*60    # refresh the snapshot once a day, in seconds
+STARTUP_BUDGET   = float(os.environ.get('LAZYMAN_STARTUP_BUDGET', 5))   # time-to-first-request, in seconds
+UNIVERSE_RETRY_DELAY     = int(os.environ.get('LAZYMAN_UNIVERSE_RETRY_DELAY', 30))   # first retry after a failed download, in seconds
+UNIVERSE_RETRY_MAX_DELAY = 30*60                                                     # the wait doubles up to this, in seconds
+
+def universe_snapshot_path():
+    return os.path.join(DATA_DIR, 'universe', '%s.csv' % provider.name)
+
+def prepare_universe(df):
+    df = df[['Symbol','Name']].dropna().drop_duplicates('Symbol').reset_index(drop=True)
+    df['Name&Symbol'] = df['Name'] + ' (' + df['Symbol'] + ')'
+    return df
 
-all_lists = pd.read_csv("https://github.com/tylerjiang1127/Stock-Tickers/blob/main/all_tickers.csv?raw=true", usecols=["Symbol","Name"])
+def build_ticker_options(df):
+    return [{'label': label, 'value': value} for label, value in zip(df['Name&Symbol'].tolist(), df['Symbol'].tolist())]
+
+## ticker search runs on the server; the dropdown only receives the top hits for what was typed
+TICKER_SEARCH_LIMIT = 20
+
+class TickerSearchIndex:
+    """ Prefix and fuzzy matching over the universe's Symbol and Name, best matches first """
+    def __init__(self, df):
+        self.df      = df.reset_index(drop=True)
+        self.symbols = self.df['Symbol'].str.upper().to_numpy(dtype=str)
+        self.names   = self.df['Name'].str.upper().to_numpy(dtype=str)
+        ## a leading space lets ' ' + query find a word start anywhere in the name
+        self.words   = np.char.add(' ', self.names)
+        self.order   = np.argsort(self.symbols)
+        self.sorted_symbols = self.symbols[self.order]
+
+    def search(self, query, limit=TICKER_SEARCH_LIMIT):
+        query = query.strip().upper()
+        if not query or len(self.df) == 0:
+            return self.df.iloc[:0]
+        ## lower score is a better match: exact symbol, symbol prefix, name prefix, word prefix, substring, fuzzy
+        score = np.full(len(self.df), np.inf)
+        lo, hi = np.searchsorted(self.sorted_symbols, [query, query + '\uffff'])
+        prefixed = self.order[lo:hi]
+        score[prefixed] = 1 + np.char.str_len(self.symbols[prefixed]) / 100
+        score[self.symbols == query] = 0
+        score = np.where(np.isinf(score) & np.char.startswith(self.names, query), 2, score)
+        score = np.where(np.isinf(score) & (np.char.find(self.words, ' ' + query) >= 0), 3, score)
+        score = np.where(np.isinf(score) & ((np.char.find(self.names, query) >= 0) | (np.char.find(self.symbols, query) >= 0)), 4, score)
+        found = np.isfinite(score).sum()
+        if found < limit and len(query) >= 2:
+            ## typos: close symbols rank by similarity after every literal match
+            for match in difflib.get_close_matches(query, self.sorted_symbols.tolist(), n=limit - found, cutoff=0.6):
+                row = self.order[np.searchsorted(self.sorted_symbols, match)]
+                if np.isinf(score[row]):
+                    score[row] = 6 - difflib.SequenceMatcher(None, query, match).ratio()
+        hits = np.flatnonzero(np.isfinite(score))
+        hits = hits[np.lexsort((hits, score[hits]))][:limit]
+        return self.df.iloc[hits]
+
+def set_universe(df):
+    global all_lists, ticker_search_index
+    all_lists, ticker_search_index = df, TickerSearchIndex(df)
+
+def refresh_universe():
+    ## download the list, store it as the new snapshot and swap it in
+    df = prepare_universe(provider.ticker_universe())
+    path = universe_snapshot_path()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    df[['Symbol','Name']].to_csv(path + '.tmp', index=False)
+    os.replace(path + '.tmp', path)
+    set_universe(df)
+    return df
 
-all_lists['Name&Symbol'] = all_lists['Name'] + ' (' + all_lists['Symbol'] + ')'
+def refresh_universe_quietly():
+    try:
+        refresh_universe()
+        return True
+    except Exception as e:
+        warnings.warn('ticker universe refresh failed: %s' % e)
+        return False
+
+def retry_universe(delay=UNIVERSE_RETRY_DELAY):
+    ## keep downloading in the background until it works, backing off exponentially
+    while True:
+        time.sleep(delay)
+        if refresh_universe_quietly():
+            return
+        delay = min(delay * 2, UNIVERSE_RETRY_MAX_DELAY)
+
+def load_universe():
+    path = universe_snapshot_path()
+    if os.path.exists(path):
+        set_universe(prepare_universe(pd.read_csv(path, keep_default_na=False, na_values=[''])))
+        if time.time() - os.path.getmtime(path) > UNIVERSE_MAX_AGE:
+            threading.Thread(target=refresh_universe_quietly, name='universe-refresh', daemon=True).start()
+    else:
+        ## first run: nothing to serve yet, so fetch once; without a network start with an empty list
+        ## and keep retrying in the background
+        try:
+            refresh_universe()
+        except Exception as e:
+            warnings.warn('ticker universe unavailable, starting without it: %s' % e)
+            set_universe(prepare_universe(pd.DataFrame(columns=['Symbol','Name'])))
+            threading.Thread(target=retry_universe, name='universe-retry', daemon=True).start()
 
-ticker_options=[
-        {'label': all_lists.iloc[i][2], 'value': all_lists.iloc[i][0]} for i in range(len(all_lists))
-        ]
+load_universe()
 
 ## Stock Market Live Prep
 
 # get the realtime price and change for
 # NASDAQ/Dow Jones/S&P 500/Russell: IXIC/DJI/GSPC/RUT
-def market_index(name_ind):
-    name = name_ind.upper()
-    url = 'https://finance.yahoo.com/quote/%5E'+name+'?p=%5E'+name
-    headers = { 'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/71.0.3578.98 Safari/537.36' }
-
-    page = requests.get(url, headers=headers)
-    web_content = BeautifulSoup(page.text, 'lxml')
-    web_content_div = web_content.find_all('div', attrs = {'class':'D(ib) Mend(20px)'})
+QUOTE_DIV_CLASS     = 'D(ib) Mend(20px)'
+_quote_div_start    = re.compile(r'<div\b[^>]*\bclass="' + re.escape(QUOTE_DIV_CLASS) + '"')
+_div_tag            = re.compile(r'<(/?)div\b', re.IGNORECASE)
+_quote_div_strainer = SoupStrainer('div', attrs = {'class': QUOTE_DIV_CLASS})
+
+def quote_fragment(page):
+    ## cut the quote div out of the raw page so only a few hundred bytes have to be parsed
+    match = _quote_div_start.search(page)
+    if match is None:
+        return None
+    depth = 0
+    for tag in _div_tag.finditer(page, match.start()):
+        depth += -1 if tag.group(1) else 1
+        if depth == 0:
+            return page[match.start():page.find('>', tag.end()) + 1]
+    return None
+
+def parse_quote_page(page):
+    fragment = quote_fragment(page)
+    if fragment is not None:
+        web_content_div = BeautifulSoup(fragment, 'html.parser').find_all('div', attrs = {'class': QUOTE_DIV_CLASS})
+    else:
+        ## markup we cannot slice safely: still only build the tree for the target div
+        web_content_div = BeautifulSoup(page, 'lxml', parse_only = _quote_div_strainer).find_all('div', attrs = {'class': QUOTE_DIV_CLASS})
     spans = web_content_div[0].find_all('span')
     texts = [span.get_text() for span in spans]
     price, change, market_status = texts[0], texts[1], texts[2]
     return price, change, market_status
 
+def market_index(name_ind):
+    name = name_ind.upper()
+    return parse_quote_page(provider.quote_page(name))
+
+MARKET_INDEXES = ['IXIC','DJI','GSPC','RUT']
+_index_executor = ThreadPoolExecutor(max_workers = len(MARKET_INDEXES), thread_name_prefix = 'market-index')
+
 def update_market_index():
-    list = ['IXIC','DJI','GSPC','RUT']
+    ## fetch the four quote pages concurrently and build the snapshot in one shot
     column_names = ['Name', 'Price', 'Change', 'Status']
-    df = pd.DataFrame(columns = column_names)
-    for ind in list:
-        price, change, market_status = market_index(ind)
-        row = pd.DataFrame([[ind, price, change, market_status]], columns = column_names)
-        df = pd.concat([df,row], ignore_index = True)
-    return df
+    quotes = _index_executor.map(market_index, MARKET_INDEXES)
+    return pd.DataFrame([[ind, *quote] for ind, quote in zip(MARKET_INDEXES, quotes)], columns = column_names)
+
+## one server-side poller refreshes the index snapshot for every viewer,
+## so upstream load does not grow with the number of open tabs
+INDEX_POLL_INTERVAL = float(os.environ.get('LAZYMAN_INDEX_POLL_INTERVAL', 5))   # in seconds
+INDEX_FIRST_SNAPSHOT_TIMEOUT = 15                                                # in seconds
+
+market_index_snapshot = None
+_index_snapshot_ready = threading.Event()
+_index_poller_stop    = threading.Event()
+_index_poller         = None
+_index_poller_lock    = threading.Lock()
+
+def poll_market_index():
+    global market_index_snapshot
+    while not _index_poller_stop.is_set():
+        try:
+            market_index_snapshot = update_market_index()
+            _index_snapshot_ready.set()
+        except Exception:
+            ## keep serving the last good snapshot until the next poll
+            pass
+        _index_poller_stop.wait(INDEX_POLL_INTERVAL)
+
+def start_index_poller():
+    global _index_poller
+    with _index_poller_lock:
+        if _index_poller is None or not _index_poller.is_alive():
+            _index_poller_stop.clear()
+            _index_poller = threading.Thread(target=poll_market_index, name='market-index-poller', daemon=True)
+            _index_poller.start()
+
+def get_market_index_snapshot():
+    start_index_poller()
+    _index_snapshot_ready.wait(INDEX_FIRST_SNAPSHOT_TIMEOUT)
+    return market_index_snapshot
+
+## Chart Downsampling
+## charts get about one point per pixel of plot width, whatever the length of the underlying data
+TECHNICAL_CHART_POINTS = int(os.environ.get('LAZYMAN_TECHNICAL_CHART_POINTS', 420))   # ~2 px per candle on the 1000 px chart
+ZOOM_CONTEXT_SHARE     = 0.25   # share of the point budget spent on bars outside a zoomed window
+
+def bucket_ids(n, points, lo=0, hi=None):
+    ## non-decreasing bucket label per bar: bars in [lo, hi) share `points` buckets, the bars outside
+    ## that window share the context budget, so zooming keeps full resolution where the user looks
+    hi = n if hi is None else hi
+    inside = max(hi - lo, 1)
+    step_in  = max(1, -(-inside // points))
+    step_out = max(step_in, -(-(n - inside) // max(int(points * ZOOM_CONTEXT_SHARE), 1)))
+    pos = np.arange(n)
+    return step_in, np.where(pos < lo, (pos - lo) // step_out,
+           np.where(pos < hi, (pos - lo) // step_in, -(-inside // step_in) + (pos - hi) // step_out))
+
+def ohlc_buckets(df, tech, points=None, window=None):
+    """ Candle groups for the chart: first open, max high, min low, last close, summed volume, last indicator value
+
+    `window` is an optional (start, end) of dates to keep at full resolution when it fits the budget.
+    Returns (bars, indicators, full_days) where full_days are the dates drawn one bar per session.
+    """
+    points = points or TECHNICAL_CHART_POINTS
+    n = len(df)
+    days = df.index.tz_localize(None).normalize() if n else df.index
+    lo, hi = 0, n
+    if window is not None:
+        lo, hi = days.searchsorted(pd.Timestamp(window[0]).normalize()), days.searchsorted(pd.Timestamp(window[1]), side='right')
+    step_in, ids = bucket_ids(n, points, lo, hi)
+    if n == 0 or ids[-1] - ids[0] == n - 1:
+        return df, tech, days
+    starts = np.r_[0, np.flatnonzero(np.diff(ids)) + 1]
+    ends   = np.r_[starts[1:] - 1, n - 1]
+    bars = pd.DataFrame({'Open'  : df['Open'].to_numpy()[starts],
+                         'High'  : np.fmax.reduceat(df['High'].to_numpy(), starts),
+                         'Low'   : np.fmin.reduceat(df['Low'].to_numpy(), starts),
+                         'Close' : df['Close'].to_numpy()[ends],
+                         'Volume': np.add.reduceat(np.nan_to_num(df['Volume'].to_numpy()), starts)},
+                        index = df.index[starts])
+    tech = tech.iloc[ends].set_axis(bars.index)
+    full_days = days[lo:hi] if step_in == 1 else days[:0]
+    return bars, tech, full_days
+
+def relayout_window(relayout):
+    """ (start, end) of a zoom in relayoutData, 'reset' for autorange, None when the x range did not change """
+    if not relayout:
+        return None
+    for key, value in relayout.items():
+        if key.startswith('xaxis') and key.endswith('.autorange') and value:
+            return 'reset'
+    starts = [v for k, v in relayout.items() if re.fullmatch(r'xaxis\d*\.range\[0\]', k)]
+    ends   = [v for k, v in relayout.items() if re.fullmatch(r'xaxis\d*\.range\[1\]', k)]
+    ranges = [v for k, v in relayout.items() if re.fullmatch(r'xaxis\d*\.range', k)]
+    if starts and ends:
+        return pd.Timestamp(starts[0]), pd.Timestamp(ends[0])
+    if ranges:
+        return pd.Timestamp(ranges[0][0]), pd.Timestamp(ranges[0][1])
+    return None
+
+## get the 1minute level data for the most recent trading day and the trading day before it
+LIVE_HISTORY_PERIOD = '5d'   # five sessions always reach back past a weekend plus a holiday
+
+def split_sessions(df):
+    ## split multi-day minute bars into the last session and the session before it
+    if df.empty:
+        return pd.DataFrame(), pd.DataFrame()
+    days = df.index.normalize()
+    sessions = days.unique()
+    last_df = df[days == sessions[-1]]
+    prev_df = df[days == sessions[-2]] if len(sessions) > 1 else pd.DataFrame()
+    return last_df, prev_df
 
-## get the 1minute level data for the most recent trading day
 def live_price_df(name):
-    step = 0
-    ticker = yf.Ticker(name)
-    today = dt.datetime.today()
-
-    start = today
-    end   = start + dt.timedelta(days = 1)
-    start_date, end_date = start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d")
-    df = ticker.history(start=start_date, end=end_date, interval="1m")
-    ## use step to judge whether the ticker is valid or not, if ticker is not a issue we use this while function to find the last trade day data
-    while df.empty:
-        start, end = start - dt.timedelta(days = 1), end - dt.timedelta(days = 1)
-        start_date, end_date = start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d")
-        df = ticker.history(start=start_date, end=end_date, interval="1m")
-        step = step+1
-        if step > 5:
-            break
-
-    prev_start = start - dt.timedelta(days = 1)
-    prev_end   = prev_start + dt.timedelta(days = 1)
-    prev_start_date, prev_end_date = prev_start.strftime("%Y-%m-%d"), prev_end.strftime("%Y-%m-%d")
-    prev_df = ticker.history(start=prev_start_date, end=prev_end_date, interval="1m")
-    ## if the ticker has issue, the step must >5, then prev_df will be set empty; if the ticker is not issue, we use while function to find the pre available trade day data
-    while prev_df.empty:
-        if step > 5:
-            break
-        else:
-            prev_start, prev_end = prev_start - dt.timedelta(days = 1), prev_end - dt.timedelta(days = 1)
-            prev_start_date, prev_end_date = prev_start.strftime("%Y-%m-%d"), prev_end.strftime("%Y-%m-%d")
-            prev_df = ticker.history(start=prev_start_date, end=prev_end_date, interval="1m")
-
-    return df, prev_df
+    ## a single ranged request instead of probing backwards one day at a time
+    df = provider.history(name, period=LIVE_HISTORY_PERIOD, interval="1m")
+    return split_sessions(df)
 
 ## set up color difference
 def live_price_color(df,prev_df):
@@ -710,13 +1863,11 @@ def live_price_color(df,prev_df):
         color = 'grey'
     return color
 
-def live_price_fig(ticker):
-    df, prev_df = live_price_df(ticker)
-
+def live_price_fig(ticker, df, prev_df):
     if df.empty is False and prev_df.empty is False:
         line = go.Scatter(
                     x = df.index.strftime("%Y-%m-%d %H:%M:%S"),
-                    y = df['Close'],
+                    y = df['Close'].tolist(),
                     fill = 'tonexty',
                     hovertemplate = '$%{y:.2f}',
                     mode='lines',
@@ -726,7 +1877,7 @@ def live_price_fig(ticker):
         )
         benchmark = go.Scatter(
                     x = df.index.strftime("%Y-%m-%d %H:%M:%S"),
-                    y = np.array([prev_df.iloc[-1]['Close']]*len(df)),
+                    y = [prev_df.iloc[-1]['Close']]*len(df),
                     hovertemplate = '$%{y:.2f}',
                     #fillcolor = live_price_color(df,prev_df),
                     mode='lines',
@@ -784,6 +1935,44 @@ def live_price_fig(ticker):
 
     return fig
 
+## Incremental Live Chart Updates
+## the browser keeps the session's figure; each tick sends a Patch with only the minutes it has not seen.
+## the per-client state {symbol, session, last, points} lives in a dcc.Store next to the chart
+def live_chart_state(symbol, df, points):
+    return {'symbol': symbol, 'session': df.index[0].strftime("%Y-%m-%d"), 'last': df.index[-1].isoformat(), 'points': points}
+
+def live_chart_patch(state, df, prev_df, extra=None):
+    """ (Patch, new state) extending the benchmark (trace 0) and price (trace 1) lines with the bars after state['last']
+
+    `extra` maps further trace indexes to per-bar values aligned with df, e.g. a live indicator line.
+    """
+    last    = pd.Timestamp(state['last'])
+    new     = np.flatnonzero(df.index > last)
+    patched = Patch()
+    if df.index.isin([last]).any():
+        ## the last plotted minute may still have been forming when it was sent: rewrite its price and overlays
+        position = df.index.get_loc(last)
+        patched['data'][1]['y'][state['points'] - 1] = float(df['Close'].iloc[position])
+        for trace, values in (extra or {}).items():
+            value = float(np.asarray(values, dtype=float)[position])
+            patched['data'][trace]['y'][state['points'] - 1] = None if value != value else value
+    if len(new):
+        x = df.index[new].strftime("%Y-%m-%d %H:%M:%S").tolist()
+        patched['data'][0]['x'].extend(x)
+        patched['data'][0]['y'].extend([float(prev_df.iloc[-1]['Close'])]*len(new))
+        patched['data'][1]['x'].extend(x)
+        patched['data'][1]['y'].extend(df['Close'].iloc[new].tolist())
+        for trace, values in (extra or {}).items():
+            patched['data'][trace]['x'].extend(x)
+            patched['data'][trace]['y'].extend([None if v != v else v for v in np.asarray(values, dtype=float)[new].tolist()])
+    patched['data'][1]['marker']['color'] = live_price_color(df, prev_df)
+    return patched, dict(state, last = df.index[-1].isoformat(), points = state['points'] + len(new))
+
+def live_chart_current(state, symbol, df):
+    ## True when the client already shows this symbol's current session
+    return (state is not None and df.empty is False and state.get('symbol') == symbol
+            and state.get('session') == df.index[0].strftime("%Y-%m-%d"))
+
 def market_index_style(change):
     green_style = {'color' : 'green', 'font-size': '15px', 'font-weight': 'bold'}
     red_style   = {'color' : 'red', 'font-size': '15px', 'font-weight': 'bold'}
@@ -867,7 +2056,10 @@ def fundamental_create_layout(app):
                            value = 'Yearly',
                            options = [{'label': 'Yearly View', 'value': 'Yearly'}, {'label': 'Quarterly View', 'value': 'Quarterly'}],
                            className = 'row'),
-            dcc.Loading(id = 'loading-output2', children=html.Div(id="show_year_quarter_view"), type = 'default ', color= "#17991C", fullscreen = False),
+            ## both views arrive with the search; the radio only switches which one is shown (client side)
+            dcc.Loading(id = 'loading-output2', children=html.Div([html.Div(id="show_yearly_view"),
+                                                                   html.Div(id="show_quarterly_view", style = {'display': 'none'})]),
+                        type = 'default ', color= "#17991C", fullscreen = False),
 
 
         ], className = "sub_page")
@@ -892,6 +2084,65 @@ def technical_create_layout(app):
 
                     ], className = "sub_page")]
 
+def peers_create_layout(app):
+    return html.Div(
+        [
+            html.Br([]),
+            html.Div([
+                      html.Div([dcc.Input(id = 'peer_symbols', type = 'text', debounce = True, style = {'width': '100%'},
+                                          placeholder = 'Up to {} tickers...(eg. AAPL, MSFT, GOOGL)'.format(PEER_MAX_SYMBOLS))],
+                               className = 'six columns'),
+                      dcc.RadioItems(id = 'peer_period',
+                                     labelStyle = {"display": "inline-block", 'font-size': '1.2rem'},
+                                     value = 'Yearly',
+                                     options = [{'label': 'Yearly View', 'value': 'Yearly'}, {'label': 'Quarterly View', 'value': 'Quarterly'}],
+                                     className = 'three columns'),
+                      html.Div([html.Button(id='peer-button', n_clicks=0, children='COMPARE')], className = 'three columns'),
+                     ], className = 'row'),
+            html.Br([]),
+            dcc.Loading(id = 'loading-output3', children=html.Div(id="show_peers"), type = 'default ', color= "#17991C", fullscreen = False),
+        ], className = "sub_page")
+
+def screener_create_layout(app):
+    metric_filters = [html.Div([
+                                html.P(column + (' (%)' if kind == 'percent' else ''), style = {'font-weight': 'bold', 'margin-bottom': '2px'}),
+                                dcc.Input(id = {'type': 'screener-min', 'index': column}, type = 'number', placeholder = 'min',
+                                          debounce = True, style = {'width': '45%'}),
+                                dcc.Input(id = {'type': 'screener-max', 'index': column}, type = 'number', placeholder = 'max',
+                                          debounce = True, style = {'width': '45%'}),
+                               ], className = 'two columns', style = {'margin-left': '0', 'margin-bottom': '10px'})
+                      for column, kind in SCREENER_METRICS]
+    return html.Div(
+        [
+            html.Br([]),
+            html.Div(metric_filters, className = 'row'),
+            html.Div([
+                      html.Div([dcc.Dropdown(id = 'screener_sort', options = [column for column, _ in SCREENER_METRICS],
+                                             value = 'P/E', clearable = False)], className = 'three columns'),
+                      dcc.RadioItems(id = 'screener_order',
+                                     labelStyle = {"display": "inline-block", 'font-size': '1.2rem'},
+                                     value = 'ascending',
+                                     options = [{'label': 'Ascending', 'value': 'ascending'}, {'label': 'Descending', 'value': 'descending'}],
+                                     className = 'four columns'),
+                     ], className = 'row'),
+            html.Br([]),
+            dcc.Loading(id = 'loading-output4', children=html.Div(id="show_screener"), type = 'default ', color= "#17991C", fullscreen = False),
+            html.Br([]),
+            # Technical scan over the price matrix
+            html.H5("Technical Scan", className = "subtitle row", style = {'borderTop': '#17991C solid', 'font-weight': 'bold'}),
+            html.Div([
+                      dcc.Checklist(id = 'scan_signals',
+                                    options = [{'label': label, 'value': signal} for signal, (label, _) in SCAN_SIGNALS.items()],
+                                    value = ['macd_turns_positive', 'cross_above_ma250'],
+                                    labelStyle = {"display": "inline-block", 'font-size': '1.2rem', 'margin-right': '10px'},
+                                    className = 'eight columns'),
+                      html.Div([html.P("Within the last N trading days", style = {'margin-bottom': '2px'}),
+                                dcc.Input(id = 'scan_within', type = 'number', min = 1, max = 20, value = 1)], className = 'two columns'),
+                      html.Div([html.Button(id='scan-button', n_clicks=0, children='SCAN')], className = 'two columns'),
+                     ], className = 'row'),
+            dcc.Loading(id = 'loading-output5', children=html.Div(id="show_scan"), type = 'default ', color= "#17991C", fullscreen = False),
+        ], className = "sub_page")
+
 def marketlive_create_layout(app):
     return [html.Br([]),
             # Current Date Time
@@ -910,6 +2161,7 @@ def marketlive_create_layout(app):
             html.Div(
             [
             dcc.Loading(dcc.Graph(id = 'stock live'), type = 'default', color= "#17991C", fullscreen = False),
+            dcc.Store(id = 'stock live state'),
             ]),
             html.Br([]),
             # Update the Live Charts for All Market Index
@@ -923,71 +2175,489 @@ def marketlive_create_layout(app):
 
                       dcc.Loading(dcc.Graph(id = 'RUT2000',style = {'borderBottom': 'thin lightgrey solid'}), type = 'default', color= "#17991C", fullscreen = False),
 
+                      dcc.Store(id = 'index live state'),
+
                      ], ),
         ]
 
 
 
 ## KDJ Formula
+def seeded_ema(values, alpha, seed):
+    ## y[t] = alpha*x[t] + (1-alpha)*y[t-1] starting from y = seed; NaN inputs stay NaN and leave y unchanged
+    values = np.asarray(values, dtype=float)
+    out = np.full(len(values), np.nan)
+    valid = ~np.isnan(values)
+    if valid.any():
+        smoothed = pd.Series(np.r_[seed, values[valid]]).ewm(alpha=alpha, adjust=False).mean().to_numpy()
+        out[valid] = smoothed[1:]
+    return out
+
+def kdj_lines(L9, H9, C):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        RSV = 100 * (np.asarray(C) - L9) / (H9 - L9)
+
+    ## K and D are 1/3-weight smoothings seeded at 50, run as a single linear filter over the array
+    K = seeded_ema(RSV, 1/3, 50)
+    D = seeded_ema(K, 1/3, 50)
+    J = 3 * K - 2 * D
+    return K, D, J
+
 def KDJ(H, L, C, df):
-    L9 = L.rolling(9).min()
-    H9 = H.rolling(9).max()
-    RSV = 100 * ((C - L9) / (H9 - L9)).values
-
-    k0 = 50
-    k_out = []
-    for j in range(len(RSV)):
-        if RSV[j] == RSV[j]: # check for nan
-            k0 = 1/3 * RSV[j] + 2/3 * k0
-            k_out.append(k0)
+    K, D, J = kdj_lines(L.rolling(9).min().values, H.rolling(9).max().values, C.values)
+    return pd.DataFrame({'K': K, 'D': D, 'J': J}, index = df.index)
+
+
+## Indicator Engine
+## every indicator declares its input columns, parameters and warm-up (bars before its first valid value);
+## get_indicators computes only the requested ones and caches each result per (data version, name, params)
+INDICATORS = {}
+DEFAULT_INDICATORS = ['macd', 'ma5', 'ma10', 'ma20', 'ma30', 'ma60', 'ma120', 'ma250', 'rsi', 'kdj']
+INDICATOR_CACHE_MAXSIZE = int(os.environ.get('LAZYMAN_INDICATOR_CACHE_MAXSIZE', 2048))
+INDICATOR_CACHE_TTL     = 60*60   # entries are keyed by data version, the ttl only bounds stale memory
+
+indicator_cache = TTLCache(INDICATOR_CACHE_MAXSIZE)
+
+def register_indicator(name, inputs, warmup, func, **params):
+    ## warmup is a number of bars or a function of the parameters
+    INDICATORS[name] = {'func': func, 'inputs': inputs, 'params': params,
+                        'warmup': warmup(**params) if callable(warmup) else warmup}
+
+def indicator_warmup(names=None):
+    return max(INDICATORS[name]['warmup'] for name in (names or DEFAULT_INDICATORS))
+
+class IndicatorContext:
+    """ Input columns of one frame plus memoized intermediates shared between indicators """
+    def __init__(self, df):
+        self.df = df
+        self._memo = {}
+
+    def _memoized(self, key, compute):
+        if key not in self._memo:
+            self._memo[key] = compute()
+        return self._memo[key]
+
+    def column(self, name):
+        return self._memoized(('column', name), lambda: self.df[name].to_numpy(dtype=float))
+
+    def sma(self, name, window):
+        return self._memoized(('sma', name, window), lambda: talib.SMA(self.column(name), timeperiod=window))
+
+    def rolling_min(self, name, window):
+        return self._memoized(('min', name, window), lambda: self.df[name].rolling(window).min().to_numpy())
+
+    def rolling_max(self, name, window):
+        return self._memoized(('max', name, window), lambda: self.df[name].rolling(window).max().to_numpy())
+
+def compute_macd(ctx, fast, slow, signal):
+    macd, macd_signal, macd_hist = talib.MACD(ctx.column('Close'), fastperiod=fast, slowperiod=slow, signalperiod=signal)
+    return {'macd': macd, 'macd_signal': macd_signal, 'macd_hist': macd_hist*2}
+
+def compute_ma(ctx, period):
+    return {'ma%d' % period: ctx.sma('Close', period)}
+
+def compute_rsi(ctx, period):
+    return {'rsi': talib.RSI(ctx.column('Close'), timeperiod=period)}
+
+def compute_kdj(ctx, window):
+    K, D, J = kdj_lines(ctx.rolling_min('Low', window), ctx.rolling_max('High', window), ctx.column('Close'))
+    return {'K': K, 'D': D, 'J': J}
+
+register_indicator('macd', ['Close'], lambda fast, slow, signal: slow + signal - 2, compute_macd, fast=12, slow=26, signal=9)
+for period in [5, 10, 20, 30, 60, 120, 250]:
+    register_indicator('ma%d' % period, ['Close'], lambda period: period - 1, compute_ma, period=period)
+register_indicator('rsi', ['Close'], lambda period: period, compute_rsi, period=14)
+register_indicator('kdj', ['High', 'Low', 'Close'], lambda window: window - 1, compute_kdj, window=9)
+
+def frame_version(df):
+    ## cheap content hash of the bars, so any change in the data gives new cache keys
+    if df.empty:
+        return (0,)
+    return (len(df), int(pd.util.hash_pandas_object(df[['Open','High','Low','Close']]).sum()))
+
+def get_indicators(df, names=None, data_version=None):
+    names   = names or DEFAULT_INDICATORS
+    version = data_version if data_version is not None else frame_version(df)
+    ctx  = IndicatorContext(df)
+    tech = {}
+    for name in names:
+        spec = INDICATORS[name]
+        key  = (version, name, tuple(sorted(spec['params'].items())))
+        tech.update(indicator_cache.get_or_fetch(key, lambda: spec['func'](ctx, **spec['params']), INDICATOR_CACHE_TTL))
+    return pd.DataFrame(tech, index = df.index)
+
+## Streaming Indicators
+## O(window) state and O(1) work per new bar for the live 1-minute charts; every object can be
+## snapshotted to a plain dict and restored from it
+class StreamingIndicator:
+    """ Base class of the incremental indicators; update() returns NaN until the warm-up is over """
+    _deques = ()   # attributes held in deques; snapshots carry them as lists so they are JSON-ready
+
+    def snapshot(self):
+        return {key: [list(item) if isinstance(item, tuple) else item for item in value] if key in self._deques else value
+                for key, value in self.__dict__.items()}
+
+    @classmethod
+    def restore(cls, state):
+        indicator = cls.__new__(cls)
+        indicator.__dict__.update(state)
+        for key in cls._deques:
+            setattr(indicator, key, deque(tuple(item) if isinstance(item, list) else item for item in state[key]))
+        return indicator
+
+class StreamingSMA(StreamingIndicator):
+    _deques = ('values',)
+
+    def __init__(self, window):
+        self.window = window
+        self.values = deque()
+        self.total  = 0.0
+
+    def update(self, value):
+        self.values.append(value)
+        self.total += value
+        if len(self.values) > self.window:
+            self.total -= self.values.popleft()
+        return self.total / self.window if len(self.values) == self.window else np.nan
+
+class StreamingEMA(StreamingIndicator):
+    """ Seeded with the SMA of the first `period` values, like talib.EMA """
+    def __init__(self, period):
+        self.period = period
+        self.alpha  = 2 / (period + 1)
+        self.count  = 0
+        self.value  = 0.0
+
+    def update(self, value):
+        self.count += 1
+        if self.count < self.period:
+            self.value += value / self.period
+            return np.nan
+        if self.count == self.period:
+            self.value += value / self.period
         else:
-            k_out.append(np.nan)
-
-    d0 = 50
-    d_out = []
-    for j in range(len(RSV)):
-        if k_out[j] == k_out[j]:
-            d0 =1/3 * k_out[j] + 2/3 * d0
-            d_out.append(d0)
+            self.value += self.alpha * (value - self.value)
+        return self.value
+
+class StreamingMACD(StreamingIndicator):
+    """ (macd, signal, hist*2) as plotted on the technical chart """
+    def __init__(self, fast=12, slow=26, signal=9):
+        self.fast, self.slow, self.signal = StreamingEMA(fast), StreamingEMA(slow), StreamingEMA(signal)
+        ## like talib.MACD, the fast EMA starts late so both averages become valid on the same bar
+        self.skip = slow - fast
+
+    def snapshot(self):
+        return {'fast': self.fast.snapshot(), 'slow': self.slow.snapshot(), 'signal': self.signal.snapshot(), 'skip': self.skip}
+
+    @classmethod
+    def restore(cls, state):
+        indicator = cls.__new__(cls)
+        indicator.fast, indicator.slow, indicator.signal = (StreamingEMA.restore(state[key]) for key in ['fast', 'slow', 'signal'])
+        indicator.skip = state['skip']
+        return indicator
+
+    def update(self, value):
+        slow = self.slow.update(value)
+        if self.skip > 0:
+            self.skip -= 1
+            return np.nan, np.nan, np.nan
+        fast = self.fast.update(value)
+        if np.isnan(slow):
+            return np.nan, np.nan, np.nan
+        macd   = fast - slow
+        signal = self.signal.update(macd)
+        if np.isnan(signal):
+            return np.nan, np.nan, np.nan
+        return macd, signal, (macd - signal) * 2
+
+class StreamingRSI(StreamingIndicator):
+    """ Wilder's RSI, seeded with the plain average of the first `period` changes like talib.RSI """
+    def __init__(self, period=14):
+        self.period = period
+        self.prev   = None
+        self.count  = 0
+        self.gain   = 0.0
+        self.loss   = 0.0
+
+    def update(self, value):
+        if self.prev is None:
+            self.prev = value
+            return np.nan
+        change, self.prev = value - self.prev, value
+        gain, loss = max(change, 0.0), max(-change, 0.0)
+        self.count += 1
+        if self.count <= self.period:
+            self.gain += gain / self.period
+            self.loss += loss / self.period
+            if self.count < self.period:
+                return np.nan
         else:
-            d_out.append(np.nan)
-
-    J = (3 * np.array(k_out)) - (2 * np.array(d_out))
-
-    kdj = pd.concat([pd.Series(k_out, name = 'K'), pd.Series(d_out, name = 'D'), pd.Series(J, name = 'J')], axis=1)
-    kdj.set_index(df.index, inplace=True)
-    return kdj
-
-def get_indicators(df):
-    # 创建dataframe
-    tech = pd.DataFrame()
-
-    #获取macd
-    tech["macd"], tech["macd_signal"], tech["macd_hist"] = talib.MACD(df['Close'])
-    tech["macd_hist"] = tech["macd_hist"]*2
-
-    #获取均线(MA5, MA10, MA20, MA30, MA60, MA120, MA250)
-    tech["ma5"]   = talib.MA(df["Close"], timeperiod=5)
-    tech["ma10"]  = talib.MA(df["Close"], timeperiod=10)
-    tech["ma20"]  = talib.MA(df["Close"], timeperiod=20)
-    tech["ma30"]  = talib.MA(df["Close"], timeperiod=30)
-    tech["ma60"]  = talib.MA(df["Close"], timeperiod=60)
-    tech["ma120"] = talib.MA(df["Close"], timeperiod=120)
-    tech["ma250"] = talib.MA(df["Close"], timeperiod=250)
-
-    #获取rsi
-    tech["rsi"] = talib.RSI(df["Close"])
-
-    #KDJ
-    H = df['High']
-    L = df['Low']
-    C = df['Close']
-    kdj = KDJ(H, L, C, df)
-    tech["K"] = kdj['K']
-    tech["D"] = kdj['D']
-    tech["J"] = kdj['J']
+            self.gain = (self.gain * (self.period - 1) + gain) / self.period
+            self.loss = (self.loss * (self.period - 1) + loss) / self.period
+        total = self.gain + self.loss
+        return 100 * self.gain / total if total else 0.0
+
+class StreamingMinMax(StreamingIndicator):
+    """ Rolling min and max over the last `window` values with monotonic deques """
+    _deques = ('mins', 'maxs')
+
+    def __init__(self, window):
+        self.window = window
+        self.count  = 0
+        self.mins   = deque()   # (position, value), values increasing
+        self.maxs   = deque()   # (position, value), values decreasing
+
+    def update(self, low, high=None):
+        high = low if high is None else high
+        position, self.count = self.count, self.count + 1
+        while self.mins and self.mins[-1][1] >= low:
+            self.mins.pop()
+        while self.maxs and self.maxs[-1][1] <= high:
+            self.maxs.pop()
+        self.mins.append((position, low))
+        self.maxs.append((position, high))
+        while self.mins[0][0] <= position - self.window:
+            self.mins.popleft()
+        while self.maxs[0][0] <= position - self.window:
+            self.maxs.popleft()
+        if self.count < self.window:
+            return np.nan, np.nan
+        return self.mins[0][1], self.maxs[0][1]
+
+class StreamingKDJ(StreamingIndicator):
+    """ Same recursion as kdj_lines: rolling low/high window, K and D seeded at 50 """
+    def __init__(self, window=9):
+        self.range = StreamingMinMax(window)
+        self.k, self.d = 50.0, 50.0
+
+    def snapshot(self):
+        return {'range': self.range.snapshot(), 'k': self.k, 'd': self.d}
+
+    @classmethod
+    def restore(cls, state):
+        indicator = cls.__new__(cls)
+        indicator.range, indicator.k, indicator.d = StreamingMinMax.restore(state['range']), state['k'], state['d']
+        return indicator
+
+    def update(self, high, low, close):
+        L9, H9 = self.range.update(low, high)
+        if np.isnan(L9) or H9 == L9:
+            return np.nan, np.nan, np.nan
+        rsv = 100 * (close - L9) / (H9 - L9)
+        self.k = 1/3 * rsv + 2/3 * self.k
+        self.d = 1/3 * self.k + 2/3 * self.d
+        return self.k, self.d, 3 * self.k - 2 * self.d
+
+
+## overlays of the stock live chart: name -> (indicator factory, input columns)
+LIVE_INDICATORS = {
+    'ma20': (lambda: StreamingSMA(20), ['Close']),
+}
+
+class LiveIndicators:
+    """ Streaming indicator state of one symbol's current session.
+
+    Only completed bars are committed to the state; the newest bar may still be forming, so its value
+    is computed on a restored copy of the state on every call and never kept.
+    """
+    def __init__(self, session):
+        self.session    = session
+        self.last       = None   # last committed (completed) bar
+        self.indicators = {name: factory() for name, (factory, inputs) in LIVE_INDICATORS.items()}
+        self.values     = {name: [] for name in LIVE_INDICATORS}
+        self.lock       = threading.Lock()
+
+    def advance(self, df):
+        with self.lock:
+            complete = df.iloc[:-1]
+            new = complete if self.last is None else complete[complete.index > self.last]
+            result = {}
+            for name, (factory, inputs) in LIVE_INDICATORS.items():
+                indicator, out = self.indicators[name], self.values[name]
+                for row in zip(*(new[column].to_numpy(dtype=float) for column in inputs)):
+                    out.append(indicator.update(*row))
+                forming = [] if df.empty else [type(indicator).restore(indicator.snapshot()).update(
+                                                   *(float(df[column].iloc[-1]) for column in inputs))]
+                result[name] = out + forming
+            if len(new):
+                self.last = new.index[-1]
+            return result
+
+live_indicator_state = TTLCache(256)
+
+def live_indicators(symbol, df):
+    ## indicator values for every bar of the session in df, computing only the bars not seen before
+    session = df.index[0].strftime("%Y-%m-%d")
+    state = live_indicator_state.get(symbol)
+    if state is None or state.session != session:
+        state = LiveIndicators(session)
+        live_indicator_state.set(symbol, state, 24*60*60)
+    return state.advance(df)
+
+## Technical Chart Data
+## bars and indicators are computed once on a superset that starts early enough for the longest
+## indicator warm-up; any date range inside it is served by slicing
+CHART_FRAME_TTL      = 60*60   # in seconds
+CHART_FRAME_LIVE_TTL = 60      # frames that include today's still-forming bar
+
+chart_frames = TTLCache(64)
+
+def warmup_start(start, bars):
+    ## trading bars to calendar days (252 sessions a year) plus slack for holidays
+    return pd.Timestamp(start) - pd.Timedelta(days=int(bars * 365 / 252) + 10)
+
+def technical_frame(symbol, start, end, names=None):
+    """ (bars, indicators) for start <= date < end, with indicators valid from the first bar """
+    names  = names or DEFAULT_INDICATORS
+    start, end = pd.Timestamp(start), pd.Timestamp(end)
+    need_start = warmup_start(start, indicator_warmup(names))
+    key    = (symbol.upper(), tuple(names))
+    cached = chart_frames.get(key)
+    if cached is None or need_start < cached['start'] or end > cached['end']:
+        ## grow to the union with the cached superset so alternating ranges do not refetch
+        fetch_start = min(need_start, cached['start']) if cached else need_start
+        fetch_end   = max(end, cached['end']) if cached else end
+        bars = daily_history(symbol, fetch_start.strftime("%Y-%m-%d"), fetch_end.strftime("%Y-%m-%d"))
+        tech = get_indicators(bars, names) if not bars.empty else pd.DataFrame(index = bars.index)
+        cached = {'start': fetch_start, 'end': fetch_end, 'bars': bars, 'tech': tech}
+        today = pd.Timestamp.now(tz=MARKET_TZ).tz_localize(None).normalize()
+        chart_frames.set(key, cached, CHART_FRAME_LIVE_TTL if fetch_end > today else CHART_FRAME_TTL)
+    bars, tech = cached['bars'], cached['tech']
+    if bars.empty:
+        return bars, tech
+    days = bars.index.tz_localize(None).normalize()
+    mask = (days >= start) & (days < end)
+    return bars[mask], tech[mask]
+
+## Technical Scanner
+## the indicators of get_indicators evaluated for the whole universe at once on (symbol, date) arrays
+## sliced from the price matrix; recursions step through the dates with one vector op over all symbols
+SCAN_BARS  = 600    # trailing bars scanned; covers MA250 plus the MACD and RSI seeding many times over
+SCAN_BLOCK = 1024   # symbols per block, bounds the memory of the intermediate arrays
+
+def ffill_2d(x):
+    ## carry the last close over missing days inside a listing; leading NaN stays NaN
+    valid = ~np.isnan(x)
+    index = np.where(valid, np.arange(x.shape[1]), 0)
+    np.maximum.accumulate(index, axis=1, out=index)
+    filled = np.take_along_axis(x, index, axis=1)
+    filled[np.cumsum(valid, axis=1) == 0] = np.nan
+    return filled
+
+def rolling_2d(x, window, reduce):
+    out = np.full(x.shape, np.nan)
+    if x.shape[1] >= window:
+        out[:, window - 1:] = reduce(np.lib.stride_tricks.sliding_window_view(x, window, axis=1), axis=-1)
+    return out
+
+def first_valid_2d(x):
+    valid = ~np.isnan(x)
+    return np.where(valid.any(axis=1), valid.argmax(axis=1), x.shape[1])
+
+def ema_2d(x, period, skip=0):
+    """ talib EMA per row: seeded with the SMA of the first `period` values (after `skip` more), then recursive """
+    alpha = 2 / (period + 1)
+    seed  = rolling_2d(x, period, np.mean)
+    seed_at = first_valid_2d(x) + period - 1 + skip
+    state = np.full(x.shape[0], np.nan)
+    out   = np.full(x.shape, np.nan)
+    for t in range(x.shape[1]):
+        state = np.where(seed_at == t, seed[:, t], alpha * x[:, t] + (1 - alpha) * state)
+        out[:, t] = state
+    return out
+
+def wilder_rsi_2d(close, period):
+    """ talib RSI per row: averages seeded with the plain mean of the first `period` changes, then Wilder smoothing """
+    change = np.diff(close, axis=1, prepend=np.nan)
+    gain, loss = np.where(change > 0, change, 0.0), np.where(change < 0, -change, 0.0)
+    gain[np.isnan(change)] = loss[np.isnan(change)] = np.nan
+    seed_gain, seed_loss = rolling_2d(gain, period, np.mean), rolling_2d(loss, period, np.mean)
+    seed_at = first_valid_2d(change) + period - 1
+    avg_gain = avg_loss = np.full(close.shape[0], np.nan)
+    out = np.full(close.shape, np.nan)
+    for t in range(close.shape[1]):
+        seeding  = seed_at == t
+        avg_gain = np.where(seeding, seed_gain[:, t], (avg_gain * (period - 1) + gain[:, t]) / period)
+        avg_loss = np.where(seeding, seed_loss[:, t], (avg_loss * (period - 1) + loss[:, t]) / period)
+        total    = avg_gain + avg_loss
+        out[:, t] = np.where(total > 0, 100 * avg_gain / np.where(total > 0, total, 1), np.where(np.isnan(total), np.nan, 0.0))
+    return out
+
+def kdj_2d(high, low, close, window):
+    ## the kdj_lines recursion (seed 50, NaN RSV bars skipped) stepped over the dates for every symbol
+    low_n, high_n = rolling_2d(low, window, np.min), rolling_2d(high, window, np.max)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rsv = 100 * (close - low_n) / (high_n - low_n)
+    rsv[~np.isfinite(rsv)] = np.nan
+    k = d = np.full(close.shape[0], 50.0)
+    K, D = np.full(close.shape, np.nan), np.full(close.shape, np.nan)
+    for t in range(close.shape[1]):
+        valid = ~np.isnan(rsv[:, t])
+        k = np.where(valid, rsv[:, t] / 3 + 2 / 3 * k, k)
+        d = np.where(valid, k / 3 + 2 / 3 * d, d)
+        K[valid, t], D[valid, t] = k[valid], d[valid]
+    return K, D, 3 * K - 2 * D
+
+def scan_indicators(high, low, close):
+    """ {name: (symbol, date) array} for the scanner signals, with the parameters registered in INDICATORS """
+    macd_params = INDICATORS['macd']['params']
+    fast, slow, signal = macd_params['fast'], macd_params['slow'], macd_params['signal']
+    close = ffill_2d(close)
+    high, low = np.where(np.isnan(high), close, high), np.where(np.isnan(low), close, low)
+    ## talib starts the fast EMA where the slow one starts, so both lines begin on the same bar
+    macd = ema_2d(close, fast, skip=slow - fast) - ema_2d(close, slow)
+    K, D, J = kdj_2d(high, low, close, INDICATORS['kdj']['params']['window'])
+    return {'close'    : close,
+            'macd_hist': (macd - ema_2d(macd, signal)) * 2,
+            'ma250'    : rolling_2d(close, INDICATORS['ma250']['params']['period'], np.mean),
+            'rsi'      : wilder_rsi_2d(close, INDICATORS['rsi']['params']['period']),
+            'J'        : J}
+
+def crossed_above(a, b):
+    return (a[:, :-1] < b[:, :-1]) & (a[:, 1:] >= b[:, 1:])
+
+## signal name -> (label, test on the scan indicators giving a (symbol, date - 1) boolean array)
+SCAN_SIGNALS = {
+    'macd_turns_positive': ('MACD histogram turns positive', lambda ind: crossed_above(ind['macd_hist'], np.zeros_like(ind['macd_hist']))),
+    'macd_turns_negative': ('MACD histogram turns negative', lambda ind: crossed_above(-ind['macd_hist'], np.zeros_like(ind['macd_hist']))),
+    'cross_above_ma250'  : ('Price crosses above MA250'    , lambda ind: crossed_above(ind['close'], ind['ma250'])),
+    'cross_below_ma250'  : ('Price crosses below MA250'    , lambda ind: crossed_above(-ind['close'], -ind['ma250'])),
+    'kdj_j_below_0'      : ('KDJ J below 0'                , lambda ind: ind['J'][:, 1:] < 0),
+    'kdj_j_above_100'    : ('KDJ J above 100'              , lambda ind: ind['J'][:, 1:] > 100),
+    'rsi_below_30'       : ('RSI below 30'                 , lambda ind: ind['rsi'][:, 1:] < 30),
+    'rsi_above_70'       : ('RSI above 70'                 , lambda ind: ind['rsi'][:, 1:] > 70),
+}
+
+scan_cache = TTLCache(64)
+
+def cached_scan(signals, within):
+    ## one scan per matrix version and query; a new matrix build changes the key
+    matrix = get_price_matrix()
+    if matrix is None:
+        return None
+    return scan_cache.get_or_fetch((matrix.folder, tuple(signals), within),
+                                   lambda: scan_universe(signals, within, matrix), CHART_FRAME_TTL)
+
+def scan_universe(signals=None, within=1, matrix=None, bars=SCAN_BARS):
+    """ {signal: [symbols]} whose signal fired on any of the last `within` trading days of the price matrix """
+    matrix  = matrix or get_price_matrix()
+    signals = signals or list(SCAN_SIGNALS)
+    hits = {signal: [] for signal in signals}
+    if matrix is None or len(matrix.dates) < 2:
+        return hits
+    a = max(len(matrix.dates) - bars, 0)
+    high, low, close = [MATRIX_FIELDS.index(field) for field in ['High', 'Low', 'Close']]
+    for start in range(0, len(matrix.symbols), SCAN_BLOCK):
+        block = slice(start, start + SCAN_BLOCK)
+        values = np.asarray(matrix.values[:, block, a:], dtype=float)
+        ind = scan_indicators(values[high], values[low], values[close])
+        ## a symbol without a bar on the last day is not scanned (delisted or not traded)
+        traded = ~np.isnan(values[close][:, -1])
+        for signal in signals:
+            fired = SCAN_SIGNALS[signal][1](ind)[:, -within:].any(axis=1) & traded
+            hits[signal] += [matrix.symbols[start + i] for i in np.flatnonzero(fired)]
+    return hits
 
-    return tech
 
 ## set up color difference for Up&Down day price change
 def vol_color(df):
@@ -1005,6 +2675,169 @@ def macd_hist_color(tech):
     return color
 
 
+## Technical Figure Builder
+## the 5-row layout is built once and reused; each request only adds traces sharing one x array
+WEBGL_THRESHOLD = 2000   # bars; longer charts draw their line traces with WebGL
+
+try:
+    ## plotly >= 6 sends numeric arrays as compact base64 typed arrays
+    from _plotly_utils.utils import convert_to_base64
+except ImportError:
+    convert_to_base64 = None
+
+KDJ_GUIDES = [20, 50, 80]
+
+_technical_layout = None
+
+def technical_layout():
+    global _technical_layout
+    if _technical_layout is not None:
+        return _technical_layout
+
+    fig = make_subplots(rows=5, cols=1, shared_xaxes=True, vertical_spacing=0.05,
+                        row_width=[0.12, 0.1, 0.08, 0.12, 0.38])
+    fig.update_layout(autosize=True,
+                      font={"family": "Raleway", "size": 12},
+                      hovermode="x unified",
+                      hoverlabel=dict(bgcolor = 'White',
+                                      bordercolor = '#17991C',
+                                      ),
+                      xaxis = dict(
+                                    showspikes = True,
+                                    showgrid = True,
+                                    spikemode = 'across+toaxis',
+                                    spikesnap = 'cursor'
+                                  ),
+                      plot_bgcolor = 'White',
+                      paper_bgcolor= 'White',
+                      height = 1400,
+                      width = 1000,
+                     )
+    fig.update_xaxes(autorange = True,
+                     showline = True,
+                     zeroline = True,
+                     rangeslider_visible = False,
+                     rangeselector = dict(
+                     buttons = list([
+                     dict(count = 1, label = '1M', step = 'month', stepmode = 'backward'),
+                     dict(count = 3, label = '3M', step = 'month', stepmode = 'backward'),
+                     dict(count = 6, label = '6M', step = 'month', stepmode = 'backward'),
+                     dict(count = 1, label = 'YTD', step = 'year', stepmode = 'todate'),
+                     dict(count = 1, label = '1Y', step = 'year', stepmode = 'backward'),
+                     dict(step = 'all')])),
+                     type="date",
+                     showticklabels=True,
+                     linewidth=1.5, linecolor='LightGrey',
+                     mirror = True,
+                     row = 1, col = 1)
+    fig.update_yaxes(autorange = True,
+                     tickprefix = '$',
+                     showgrid = True,
+                     gridcolor= 'LightBlue',
+                     showline = True,
+                     title = "Stock Price",
+                     type = 'linear',
+                     zeroline = True,
+                     linewidth=1.5, linecolor='LightGrey',
+                     mirror = True,
+                     row = 1, col = 1)
+    for row, title in [(2, "MACD"), (3, "Volume"), (4, "RSI")]:
+        fig.update_xaxes(autorange = True,
+                         showline = True,
+                         type = "date",
+                         showticklabels=True,
+                         linewidth=1.5, linecolor='LightGrey',
+                         mirror = True,
+                         row = row, col = 1)
+        fig.update_yaxes(autorange = True,
+                         showgrid = True,
+                         gridcolor= 'LightBlue',
+                         showline = True,
+                         title = title,
+                         type = 'linear',
+                         zeroline = True,
+                         zerolinecolor = 'Black',
+                         zerolinewidth = 0.5,
+                         linewidth=1.5, linecolor='LightGrey',
+                         mirror = True,
+                         row = row, col = 1)
+    fig.update_xaxes(autorange = True,
+                     showline = True,
+                     type = "date",
+                     showticklabels=True,
+                     linewidth=1.5, linecolor='LightGrey',
+                     mirror = True,
+                     row = 5, col = 1)
+    fig.update_yaxes(autorange = True,
+                     showgrid = False,
+                     showline = True,
+                     tickmode = 'array',
+                     tickvals = KDJ_GUIDES,
+                     title = "KDJ",
+                     type = 'linear',
+                     zeroline = False,
+                     linewidth=1.5, linecolor='LightGrey',
+                     mirror = True,
+                     row = 5, col = 1)
+    ## constant KDJ guide levels are shapes, not three full-length traces
+    for level in KDJ_GUIDES:
+        fig.add_shape(type = 'line', xref = 'x domain', x0 = 0, x1 = 1, yref = 'y5', y0 = level, y1 = level,
+                      line = {"color": "grey", "width": 1, "dash": "dash"}, layer = 'below')
+
+    _technical_layout = fig.layout.to_plotly_json()
+    return _technical_layout
+
+def technical_figure(df, tech, title, webgl=None, full_days=None):
+    """ Plain-dict figure of the candlestick, MA, MACD, volume, RSI and KDJ rows for `df`
+
+    `full_days` are the dates drawn one bar per session (all of `df` by default); only the days missing
+    between them are hidden, so downsampled candle groups keep their calendar spacing.
+    """
+    webgl = len(df) > WEBGL_THRESHOLD if webgl is None else webgl
+    line_type = 'scattergl' if webgl else 'scatter'
+    x = df.index.strftime("%Y-%m-%d").to_numpy()
+
+    def line(y, yaxis, name, color, width=0.85, showlegend=False):
+        return {'type': line_type, 'x': x, 'y': y.to_numpy(), 'mode': 'lines', 'line': {'color': color, 'width': width},
+                'showlegend': showlegend, 'name': name, 'yaxis': yaxis}
+
+    data = [{'type': 'candlestick', 'x': x, 'open': df['Open'].to_numpy(), 'close': df['Close'].to_numpy(),
+             'high': df['High'].to_numpy(), 'low': df['Low'].to_numpy(), 'showlegend': False, 'name': '', 'yaxis': 'y'}]
+    for name, color in [('ma5', "#A83838"), ('ma10', "#F09A16"), ('ma20', "#EFF048"), ('ma30', "#5DF016"),
+                        ('ma60', "#13C3F0"), ('ma120', "#493CF0"), ('ma250', "#F000DF")]:
+        data.append(line(tech[name], 'y', name.upper(), color, showlegend=True))
+    data += [
+        {'type': 'bar', 'x': x, 'y': tech['macd_hist'].to_numpy(), 'width': 10, 'yaxis': 'y2',
+         'marker': {"color": macd_hist_color(tech), "line": {"color": "rgb(255, 255, 255)", "width": 0}},
+         'showlegend': False, 'name': 'MACD Hist'},
+        line(tech['macd'], 'y2', "MACD", "orange"),
+        line(tech['macd_signal'], 'y2', "MACD_Signal", "deepskyblue"),
+        {'type': 'bar', 'x': x, 'y': df['Volume'].to_numpy(), 'yaxis': 'y3',
+         'marker': {"color": vol_color(df), "line": {"color": "rgb(255, 255, 255)", "width": 0.1}},
+         'showlegend': False, 'name': 'Volume'},
+        {'type': line_type, 'x': x, 'y': tech['rsi'].to_numpy(), 'mode': 'lines', 'line': {"color": "Orange"},
+         'showlegend': False, 'name': "RSI", 'yaxis': 'y4'},
+        line(tech['K'], 'y5', "K", "gold"),
+        line(tech['D'], 'y5', "D", "blue"),
+        line(tech['J'], 'y5', "J", "purple"),
+    ]
+    for trace in data:
+        trace.update(xaxis = 'x', opacity = 0.8, hoverinfo = "all")
+
+    layout = dict(technical_layout())
+    layout['title'] = {'text': title}
+    days = df.index.tz_localize(None).normalize() if full_days is None else full_days
+    if not webgl and len(days):
+        ## hide the dates without bars (weekends, holidays); WebGL traces do not support rangebreaks
+        dt_breaks = pd.date_range(days[0], days[-1]).difference(days).strftime("%Y-%m-%d").tolist()
+        for axis in ['xaxis', 'xaxis2', 'xaxis3', 'xaxis4', 'xaxis5']:
+            layout[axis] = dict(layout[axis], rangebreaks = [{'values': dt_breaks}])
+
+    fig = {'data': data, 'layout': layout}
+    if convert_to_base64 is not None:
+        convert_to_base64(fig['data'])
+    return fig
+
 ## Layout Design and Interactive Design
 
 app = dash.Dash(__name__)
@@ -1039,7 +2872,7 @@ app.layout = html.Div([
         [
             html.Div([## dcc.Input(id = 'enter_ticker', placeholder='Enter Ticker here...(eg.AAPL)', value='', type = 'text'),
             dcc.Dropdown(id='enter_ticker',
-            options=ticker_options,
+            options=[],                         #filled from the server-side search index as the user types
             optionHeight=35,                    #height/space between dropdown options
             value='',                    #dropdown value selected automatically when page loads
             disabled=False,                     #disable dropdown value selection
@@ -1074,6 +2907,16 @@ app.layout = html.Div([
                 href="https://tylerjiang1127.pythonanywhere.com/technical",
                 className="tab",
             ),
+            dcc.Link(
+                "Peer Comparison",
+                href="https://tylerjiang1127.pythonanywhere.com/peers",
+                className="tab",
+            ),
+            dcc.Link(
+                "Screener",
+                href="https://tylerjiang1127.pythonanywhere.com/screener",
+                className="tab",
+            ),
         ],
         className="row all-tabs", style = {'borderBottom': 'thin #17991C solid'}
     ),
@@ -1085,6 +2928,22 @@ app.layout = html.Div([
 
 ], className = "page")
 
+## Ticker search: only the best matches for the typed text are sent to the dropdown
+@app.callback(Output('enter_ticker', 'options'),
+              [Input('enter_ticker', 'search_value')],
+              [State('enter_ticker', 'value')])
+def update_ticker_options(search_value, value):
+    if not search_value:
+        ## keep the current options so the selected ticker stays displayed
+        raise PreventUpdate
+    options = build_ticker_options(ticker_search_index.search(search_value))
+    ## the dropdown filters options again in the browser; let every ranked hit (incl. fuzzy ones) through
+    for option in options:
+        option['search'] = option['label'] + ' ' + search_value
+    if value and value not in [option['value'] for option in options]:
+        options += build_ticker_options(all_lists[all_lists['Symbol'] == value])
+    return options
+
 ## Click the Link Interaction
 @app.callback(Output("page-content", "children"), [Input("url", "pathname")])
 def display_page(pathname):
@@ -1092,6 +2951,10 @@ def display_page(pathname):
         return fundamental_create_layout(app)
     elif pathname=="/technical":
         return technical_create_layout(app)
+    elif pathname=="/peers":
+        return peers_create_layout(app)
+    elif pathname=="/screener":
+        return screener_create_layout(app)
     else:
         return marketlive_create_layout(app)
 
@@ -1111,7 +2974,7 @@ def update_overview(n_clicks, input_value):
         return html.Div([
                          html.Div([
                                    html.H5("Company Information", className = "subtitle padded"),
-                                   html.Table(make_dash_table(company_info))
+                                   render_table(company_info)
                                    ], className = 'five columns'),
                          html.Div([
                                    html.H5("Company Description", className = "subtitle padded"),
@@ -1123,7 +2986,7 @@ def update_overview(n_clicks, input_value):
         return html.Div([
                           html.Div([
                                     html.H5("Company Information", className = "subtitle padded"),
-                                    html.Table(make_dash_table(company_info))
+                                    render_table(company_info)
                                     ], className = 'five columns'),
                           html.Div([
                                     html.H5("Company Description", className = "subtitle padded"),
@@ -1132,35 +2995,34 @@ def update_overview(n_clicks, input_value):
                          ], className = 'row', style = {'borderBottom': 'thin lightgrey solid'})
 
 ## get the Yearly/Quarterly View for specific ticker
-@app.callback(
-    Output('show_year_quarter_view', 'children'),
-    [Input('Year_Quarter', 'value')],
-    [State('enter_ticker', 'value')],
-)
-def update_year_quarter_view(Year_Quarter, input_value):
+def year_quarter_view(input_value, Year_Quarter):
     # Content 2 -- Last Quarter Fundamentals Results
-    input_value = input_value.upper()
     IncomeStatement, BalanceSheet, CashFlow, lastquarter1, lastquarter2, lastquarter3, currency = fundamentals_tables(input_value, Year_Quarter)
 
     if IncomeStatement.empty:
         return []
     else:
+        ## figures are served from the cache until the statements behind them change
+        version = statements_version(get_fundamentals_bundle(input_value)[Year_Quarter])
+        def statement_figure(build, table):
+            return cached_figure((build.__name__, input_value, Year_Quarter, version), lambda: build(table.iloc[::-1]))
+
         return  [
                 html.H5("Most Recent Fundamentals Metrics", className = "subtitle row"),
                 html.Div([
                           html.Div([
                                     html.H6("Income Statement (as of {})".format(IncomeStatement.iloc[0][0]), className = "sub_subtitle padded", style = {'font-weight': 'bold'}),
-                                    html.Table(make_dash_table(lastquarter1))
+                                    render_table(lastquarter1)
                                     ], className = 'four columns'),
 
                           html.Div([
                                     html.H6("Balance Sheet (as of {})".format(BalanceSheet.iloc[0][0]), className = "sub_subtitle padded", style = {'font-weight': 'bold'}),
-                                    html.Table(make_dash_table(lastquarter2))
+                                    render_table(lastquarter2)
                                     ], className = 'four columns'),
 
                           html.Div([
                                     html.H6("Cash Flow (as of {})".format(CashFlow.iloc[0][0]), className = "sub_subtitle padded", style = {'font-weight': 'bold'}),
-                                    html.Table(make_dash_table(lastquarter3))
+                                    render_table(lastquarter3)
                                     ], className = 'four columns'),
                          ], className = 'row', style = {'borderBottom': 'thin lightgrey solid'}),
 
@@ -1170,12 +3032,12 @@ def update_year_quarter_view(Year_Quarter, input_value):
                 # Content Row 3 -- Past 2 Years Income Statement Figures
                 html.H5("Profitability Trend", className = "subtitle row"),
                 html.Div([
-                          dcc.Graph(id = 'profitability bar',
-                                    figure = incomestatement_bar(IncomeStatement.iloc[::-1])
+                          dcc.Graph(id = 'profitability bar ' + Year_Quarter,
+                                    figure = statement_figure(incomestatement_bar, IncomeStatement)
                                     , className = 'seven columns'),
 
-                          dcc.Graph(id = 'profitability line',
-                                    figure = incomestatement_line(IncomeStatement.iloc[::-1])
+                          dcc.Graph(id = 'profitability line ' + Year_Quarter,
+                                    figure = statement_figure(incomestatement_line, IncomeStatement)
                                     , className = 'five columns'),
 
                          ], className = 'row', style = {'borderBottom': 'thin lightgrey solid'}),
@@ -1186,12 +3048,12 @@ def update_year_quarter_view(Year_Quarter, input_value):
                 # Content Row 4 -- Past 2 Years Debt-Asset Figures
                 html.H5("Debt-Asset Trend", className = "subtitle row"),
                 html.Div([
-                          dcc.Graph(id = 'Debt-Asset bar',
-                                    figure = balancesheet_stackbar(BalanceSheet.iloc[::-1])
+                          dcc.Graph(id = 'Debt-Asset bar ' + Year_Quarter,
+                                    figure = statement_figure(balancesheet_stackbar, BalanceSheet)
                                     , className = 'seven columns'),
 
-                          dcc.Graph(id = 'Debt-Asset line',
-                                    figure = balancesheet_line(BalanceSheet.iloc[::-1])
+                          dcc.Graph(id = 'Debt-Asset line ' + Year_Quarter,
+                                    figure = statement_figure(balancesheet_line, BalanceSheet)
                                     , className = 'five columns'),
 
                          ], className = 'row', style = {'borderBottom': 'thin lightgrey solid'}),
@@ -1202,17 +3064,56 @@ def update_year_quarter_view(Year_Quarter, input_value):
                 # Content Row 5 -- Past 2 Years Cash Flow Figures
                 html.H5("Cash Flow Trend", className = "subtitle row"),
                 html.Div([
-                          dcc.Graph(id = 'cashflow bar',
-                                    figure = cashflow_bar(CashFlow.iloc[::-1])
+                          dcc.Graph(id = 'cashflow bar ' + Year_Quarter,
+                                    figure = statement_figure(cashflow_bar, CashFlow)
                                     , className = 'seven columns'),
 
-                          dcc.Graph(id = 'cashflow line',
-                                    figure = cashflow_line(CashFlow.iloc[::-1])
+                          dcc.Graph(id = 'cashflow line ' + Year_Quarter,
+                                    figure = statement_figure(cashflow_line, CashFlow)
                                     , className = 'five columns'),
 
                          ], className = 'row', style = {'borderBottom': 'thin lightgrey solid'})
         ]
 
+@app.callback(
+    [Output('show_yearly_view', 'children'), Output('show_quarterly_view', 'children')],
+    [Input('submit-button', 'n_clicks')],
+    [State('enter_ticker', 'value')],
+)
+def update_year_quarter_view(n_clicks, input_value):
+    input_value = input_value.upper()
+    return year_quarter_view(input_value, 'Yearly'), year_quarter_view(input_value, 'Quarterly')
+
+app.clientside_callback(
+    """
+    function(Year_Quarter) {
+        var quarterly = Year_Quarter === 'Quarterly';
+        return [{'display': quarterly ? 'none' : 'block'}, {'display': quarterly ? 'block' : 'none'}];
+    }
+    """,
+    [Output('show_yearly_view', 'style'), Output('show_quarterly_view', 'style')],
+    [Input('Year_Quarter', 'value')]
+)
+
+## rows for the large tables from render_table, built in the browser from the column-oriented payload
+app.clientside_callback(
+    """
+    function(columns) {
+        var keys = Object.keys(columns || {});
+        var n = keys.length ? columns[keys[0]].length : 0;
+        var rows = new Array(n);
+        for (var i = 0; i < n; i++) {
+            var row = {};
+            for (var k = 0; k < keys.length; k++) { row[keys[k]] = columns[keys[k]][i]; }
+            rows[i] = row;
+        }
+        return rows;
+    }
+    """,
+    Output({'type': 'table', 'index': MATCH}, 'data'),
+    Input({'type': 'table-columns', 'index': MATCH}, 'data')
+)
+
 ## after the another search, reset the year/quarter button
 @app.callback(Output('Year_Quarter','value'),
              [Input('submit-button','n_clicks')])
@@ -1222,403 +3123,122 @@ def update(reset):
 ## get the technical charts based on the ticker
 @app.callback(
     Output('technical chart', 'figure'),
-    [Input('submit-button', 'n_clicks')],
+    [Input('submit-button', 'n_clicks'), Input('technical chart', 'relayoutData')],
     [State('enter_ticker', 'value'), State('my-date-picker-range','start_date'), State('my-date-picker-range','end_date')]
 )
-def update_chart(n_clicks, input_value, start_date, end_date):
+def update_chart(n_clicks, relayout, input_value, start_date, end_date):
     input_value = input_value.upper()
-    ticker = yf.Ticker(input_value)
 
     ## set up timeframe
     start_date_object, end_date_object = dt.date.fromisoformat(start_date), dt.date.fromisoformat(end_date)
     end_date_object = end_date_object + dt.timedelta(days=1)
     start_date, end_date = start_date_object.strftime("%Y-%m-%d"), end_date_object.strftime("%Y-%m-%d")
 
-    ## get the historical stock data for this ticker and also this ticker's info
-    df = ticker.history(start=start_date, end=end_date, interval="1d")
-    ticker_info = ticker.info
-
-    ## get the technical
-    tech_ind = get_indicators(df)
-
-
-    trace_1 = go.Candlestick(
-                x = df.reset_index(inplace=False)['Date'],
-                open = df['Open'],
-                close = df['Close'],
-                high = df['High'],
-                low = df['Low'],
-                showlegend = False,
-                name = ''
-            )
-    trace_1_ma5 = go.Scatter(
-                x = df.reset_index(inplace=False)['Date'],
-                y = tech_ind['ma5'],
-                mode='lines',
-                line={"color": "#A83838",
-                      "width": 0.85},
-                showlegend = True,
-                name = "MA5"
-    )
-    trace_1_ma10 = go.Scatter(
-                x = df.reset_index(inplace=False)['Date'],
-                y = tech_ind['ma10'],
-                mode='lines',
-                line={"color": "#F09A16",
-                      "width": 0.85},
-                showlegend = True,
-                name = "MA10"
-    )
-    trace_1_ma20 = go.Scatter(
-                x = df.reset_index(inplace=False)['Date'],
-                y = tech_ind['ma20'],
-                mode='lines',
-                line={"color": "#EFF048",
-                     "width": 0.85},
-                showlegend = True,
-                name = "MA20"
-    )
-    trace_1_ma30 = go.Scatter(
-                x = df.reset_index(inplace=False)['Date'],
-                y = tech_ind['ma30'],
-                mode='lines',
-                line={"color": "#5DF016",
-                     "width": 0.85},
-                showlegend = True,
-                name = "MA30"
-    )
-    trace_1_ma60 = go.Scatter(
-                x = df.reset_index(inplace=False)['Date'],
-                y = tech_ind['ma60'],
-                mode='lines',
-                line={"color": "#13C3F0",
-                     "width": 0.85},
-                showlegend = True,
-                name = "MA60"
-    )
-    trace_1_ma120 = go.Scatter(
-                x = df.reset_index(inplace=False)['Date'],
-                y = tech_ind['ma120'],
-                mode='lines',
-                line={"color": "#493CF0",
-                     "width": 0.85},
-                showlegend = True,
-                name = "MA120"
-    )
-    trace_1_ma250 = go.Scatter(
-                x = df.reset_index(inplace=False)['Date'],
-                y = tech_ind['ma250'],
-                mode='lines',
-                line={"color": "#F000DF",
-                     "width": 0.85},
-                showlegend = True,
-                name = "MA250"
-    )
-
-
-
-    trace_2 = go.Bar(
-                x = df.reset_index(inplace=False)['Date'],
-                y = df['Volume'],
-                marker={
-                    "color": vol_color(df),
-                    "line": {
-                        "color": "rgb(255, 255, 255)",
-                        "width": 0.1,
-                    }},
-                showlegend = False,
-                name = 'Volume'
-            )
-
-
-    trace_3 = go.Scatter(
-                x = df.reset_index(inplace=False)['Date'],
-                y = tech_ind['rsi'],
-                mode='lines',
-                line={"color": "Orange"},
-                showlegend = False,
-                name = "RSI"
-    )
-
-    trace_4a = go.Bar(
-                x = df.reset_index(inplace=False)['Date'],
-                y = tech_ind['macd_hist'],
-                width = 10,
-                marker={
-                    "color": macd_hist_color(tech_ind),
-                    "line": {
-                        "color": "rgb(255, 255, 255)",
-                        "width": 0,
-                    }
-                        },
-                showlegend = False,
-                name = 'MACD Hist'
-                )
-    trace_4b = go.Scatter(
-                x = df.reset_index(inplace=False)['Date'],
-                y = tech_ind['macd'],
-                mode='lines',
-                line={"color": "orange",
-                      "width": 0.85},
-                showlegend = False,
-                name = "MACD"
-                )
-    trace_4c = go.Scatter(
-                x = df.reset_index(inplace=False)['Date'],
-                y = tech_ind['macd_signal'],
-                mode='lines',
-                line={"color": "deepskyblue",
-                      "width": 0.85},
-                showlegend = False,
-                name = "MACD_Signal"
-                )
-
-    trace_5a = go.Scatter(
-                x = df.reset_index(inplace=False)['Date'],
-                y = tech_ind['K'],
-                mode='lines',
-                line={"color": "gold",
-                      "width": 0.85},
-                showlegend = False,
-                name = "K"
-                )
-    trace_5b = go.Scatter(
-                x = df.reset_index(inplace=False)['Date'],
-                y = tech_ind['D'],
-                mode='lines',
-                line={"color": "blue",
-                      "width": 0.85},
-                showlegend = False,
-                name = "D"
-                )
-    trace_5c = go.Scatter(
-                x = df.reset_index(inplace=False)['Date'],
-                y = tech_ind['J'],
-                mode='lines',
-                line={"color": "purple",
-                      "width": 0.85},
-                showlegend = False,
-                name = "J"
-                )
-    trace_5_line20 = go.Scatter(
-                x = df.reset_index(inplace=False)['Date'],
-                y = np.array(len(df)*[20]),
-                mode='lines',
-                line={"color": "grey",
-                      "width": 1,
-                     "dash": "dash"},
-                showlegend = False,
-                name = ""
-                )
-    trace_5_line50 = go.Scatter(
-                x = df.reset_index(inplace=False)['Date'],
-                y = np.array(len(df)*[50]),
-                mode='lines',
-                line={"color": "grey",
-                      "width": 1,
-                     "dash": "dash"},
-                showlegend = False,
-                name = ""
-                )
-    trace_5_line80 = go.Scatter(
-                x = df.reset_index(inplace=False)['Date'],
-                y = np.array(len(df)*[80]),
-                mode='lines',
-                line={"color": "grey",
-                      "width": 1,
-                      "dash": "dash"},
-                showlegend = False,
-                name = ""
-                )
-
-    fig = make_subplots(rows=5, cols=1, shared_xaxes=True, vertical_spacing=0.05,
-                        row_width=[0.12, 0.1, 0.08, 0.12, 0.38]
-                        #specs=[[{"rowspan": 3}],
-                              #[None],
-                              #[None],
-                              #[{"rowspan": 2}],
-                              #[None],
-                              #[{}],
-                              #[{}]]
-                              )
-
-    fig.add_trace(trace_1,row=1,col=1)
-    fig.add_trace(trace_1_ma5,row=1,col=1)
-    fig.add_trace(trace_1_ma10,row=1,col=1)
-    fig.add_trace(trace_1_ma20,row=1,col=1)
-    fig.add_trace(trace_1_ma30,row=1,col=1)
-    fig.add_trace(trace_1_ma60,row=1,col=1)
-    fig.add_trace(trace_1_ma120,row=1,col=1)
-    fig.add_trace(trace_1_ma250,row=1,col=1)
-
-    fig.add_trace(trace_4a,row=2,col=1)
-    fig.add_trace(trace_4b,row=2,col=1)
-    fig.add_trace(trace_4c,row=2,col=1)
-
-    fig.add_trace(trace_2,row=3,col=1)
-    fig.add_trace(trace_3,row=4,col=1)
-
-    fig.add_trace(trace_5a,row=5,col=1)
-    fig.add_trace(trace_5b,row=5,col=1)
-    fig.add_trace(trace_5c,row=5,col=1)
-    fig.add_trace(trace_5_line20,row=5,col=1)
-    fig.add_trace(trace_5_line50,row=5,col=1)
-    fig.add_trace(trace_5_line80,row=5,col=1)
-
-    # build complete timepline from start date to end date
-    dt_all = pd.date_range(start=df.reset_index()['Date'].iloc[0],end=df.reset_index()['Date'].iloc[-1])
-
-    # retrieve the dates that ARE in the original datset
-    dt_obs = [d.strftime("%Y-%m-%d") for d in pd.to_datetime(df.reset_index()['Date'])]
-
-    # define dates with missing values
-    dt_breaks = [d for d in dt_all.strftime("%Y-%m-%d").tolist() if not d in dt_obs]
-
-    fig.update_xaxes(rangebreaks=[dict(values=dt_breaks)])
-    fig.update_layout(title = '{}'.format(ticker_info['shortName']),
-                      autosize=True,
-                      font={"family": "Raleway", "size": 12},
-                      hovermode="x unified",
-                      hoverlabel=dict(bgcolor = 'White',
-                                      bordercolor = '#17991C',
-                                      ),
-                      xaxis = dict(
-                                    showspikes = True,
-                                    showgrid = True,
-                                    spikemode = 'across+toaxis',
-                                    spikesnap = 'cursor'
-                                  ),
-                      plot_bgcolor = 'White',
-                      paper_bgcolor= 'White',
-                      height = 1400,
-                      width = 1000,
-                     )
-    # fig.update_xaxes(matches='x')
-    fig.update_traces(xaxis='x',
-                      opacity = 0.8,
-                      hoverinfo = "all",
-                      )
-
-    fig.update_xaxes(autorange = True,
-                     showline = True,
-                     #title = "Date",
-                     zeroline = True,
-                     rangeslider_visible = False,
-                     rangeselector = dict(
-                     buttons = list([
-                     dict(count = 1, label = '1M', step = 'month', stepmode = 'backward'),
-                     dict(count = 3, label = '3M', step = 'month', stepmode = 'backward'),
-                     dict(count = 6, label = '6M', step = 'month', stepmode = 'backward'),
-                     dict(count = 1, label = 'YTD', step = 'year', stepmode = 'todate'),
-                     dict(count = 1, label = '1Y', step = 'year', stepmode = 'backward'),
-                     dict(step = 'all')])),
-                     type="date",
-                     showticklabels=True,
-                     linewidth=1.5, linecolor='LightGrey',
-                     mirror = True,
-                     row = 1, col = 1)
-    fig.update_yaxes(autorange = True,
-                     tickprefix = '$',
-                     showgrid = True,
-                     gridcolor= 'LightBlue',
-                     showline = True,
-                     title = "Stock Price",
-                     type = 'linear',
-                     zeroline = True,
-                     linewidth=1.5, linecolor='LightGrey',
-                     mirror = True,
-                     row = 1, col = 1)
-
-    fig.update_xaxes(autorange = True,
-                     showline = True,
-                     #title = "Date",
-                     type = "date",
-                     showticklabels=True,
-                     linewidth=1.5, linecolor='LightGrey',
-                     mirror = True,
-                     row = 2, col = 1)
-    fig.update_yaxes(autorange = True,
-                     #tickprefix = '$',
-                     showgrid = True,
-                     gridcolor= 'LightBlue',
-                     showline = True,
-                     title = "MACD",
-                     type = 'linear',
-                     zeroline = True,
-                     zerolinecolor = 'Black',
-                     zerolinewidth = 0.5,
-                     linewidth=1.5, linecolor='LightGrey',
-                     mirror = True,
-                     row = 2, col = 1)
-
-    fig.update_xaxes(autorange = True,
-                     showline = True,
-                     #title = "Date",
-                     type = "date",
-                     showticklabels=True,
-                     linewidth=1.5, linecolor='LightGrey',
-                     mirror = True,
-                     row = 3, col = 1)
-    fig.update_yaxes(autorange = True,
-                     #tickprefix = '$',
-                     showgrid = True,
-                     gridcolor= 'LightBlue',
-                     showline = True,
-                     title = "Volume",
-                     type = 'linear',
-                     zeroline = True,
-                     zerolinecolor = 'Black',
-                     zerolinewidth = 0.5,
-                     linewidth=1.5, linecolor='LightGrey',
-                     mirror = True,
-                     row = 3, col = 1)
+    ## a zoom refetches the chart with full resolution inside the visible window; other relayouts (resize, drag mode)
+    ## are ignored before any data is loaded
+    window = None
+    if dash.callback_context.triggered_id == 'technical chart':
+        window = relayout_window(relayout)
+        if window is None:
+            raise PreventUpdate
+        if window == 'reset':
+            window = None
+
+    ## get the historical stock data with its technical indicators and also this ticker's info
+    df, tech_ind = technical_frame(input_value, start_date, end_date)
+    ticker_info = get_ticker_info(input_value)
+
+    def build():
+        bars, tech, full_days = ohlc_buckets(df, tech_ind, window = window)
+        fig = technical_figure(bars, tech, '{}'.format(ticker_info['shortName']), full_days = full_days)
+        fig['layout']['uirevision'] = '{}|{}|{}'.format(input_value, start_date, end_date)
+        if window is not None:
+            for axis in ['xaxis', 'xaxis2', 'xaxis3', 'xaxis4', 'xaxis5']:
+                fig['layout'][axis] = dict(fig['layout'][axis], autorange = False,
+                                           range = [window[0].strftime("%Y-%m-%d %H:%M:%S"), window[1].strftime("%Y-%m-%d %H:%M:%S")])
+        return fig
+
+    window_key = None if window is None else (window[0].isoformat(), window[1].isoformat())
+    return cached_figure(('technical', input_value, start_date, end_date, window_key, TECHNICAL_CHART_POINTS, frame_version(df)), build)
+
+## compare the latest fundamentals of several tickers
+@app.callback(
+    Output('show_peers', 'children'),
+    [Input('peer-button', 'n_clicks'), Input('peer_symbols', 'value'), Input('peer_period', 'value')],
+    [State('enter_ticker', 'value')]
+)
+def update_peers(n_clicks, peer_symbols, period, input_value):
+    ## the searched ticker is always part of the comparison
+    symbols = parse_symbols('{} {}'.format(input_value or '', peer_symbols or ''))
+    if not symbols:
+        return []
+    metrics = peer_metrics(symbols, period)
+    if metrics.empty:
+        return [html.H5("No statements found for {}".format(', '.join(symbols)), className = "subtitle row")]
+
+    table = format_kpis(metrics, [kind for _, kind in PEER_KPIS]).reset_index()
+    missing = [symbol for symbol in symbols if symbol not in metrics.index]
+    return [
+            html.H5("Latest {} Fundamentals".format(period), className = "subtitle row"),
+            render_table(table, header = True),
+            html.P("No statements found for {}".format(', '.join(missing)), style = {'color': 'Grey'}) if missing else html.Br([]),
+            html.Div([
+                      dcc.Graph(id = 'peer margins',
+                                figure = peer_bar(metrics, ['Gross Margin', 'Operating Margin', 'Net Profit Margin'],
+                                                  ["#DDDE2F", "#36FFF9", "#38AFF5"], ".0%"),
+                                className = 'six columns'),
+                      dcc.Graph(id = 'peer ratios',
+                                figure = peer_bar(metrics, ['Cash Ratio', 'Current Ratio'], ["#17991C", "#F09A16"]),
+                                className = 'three columns'),
+                      dcc.Graph(id = 'peer free cash flow',
+                                figure = peer_bar(metrics, ['Free Cash Flow'], ["#493CF0"]),
+                                className = 'three columns'),
+                     ], className = 'row', style = {'borderBottom': 'thin lightgrey solid'}),
+        ]
 
-    fig.update_xaxes(autorange = True,
-                     showline = True,
-                     #title = "Date",
-                     type = "date",
-                     showticklabels=True,
-                     linewidth=1.5, linecolor='LightGrey',
-                     mirror = True,
-                     row = 4, col = 1)
-    fig.update_yaxes(autorange = True,
-                     #tickprefix = '$',
-                     showgrid = True,
-                     gridcolor= 'LightBlue',
-                     showline = True,
-                     title = "RSI",
-                     type = 'linear',
-                     zeroline = True,
-                     zerolinecolor = 'Black',
-                     zerolinewidth = 0.5,
-                     linewidth=1.5, linecolor='LightGrey',
-                     mirror = True,
-                     row = 4, col = 1)
+## filter and sort the precomputed screener table
+@app.callback(
+    Output('show_screener', 'children'),
+    [Input({'type': 'screener-min', 'index': ALL}, 'value'), Input({'type': 'screener-max', 'index': ALL}, 'value'),
+     Input('screener_sort', 'value'), Input('screener_order', 'value')]
+)
+def update_screener(lows, highs, sort_by, order):
+    table = get_screener_table()
+    if table is None:
+        return [html.P("The screener table has not been built yet (python lazyman_stock_research.py --build-screener)",
+                       style = {'color': 'Grey'})]
+    ranges = {}
+    for (column, kind), low, high in zip(SCREENER_METRICS, lows, highs):
+        scale = 100 if kind == 'percent' else 1
+        if low is not None or high is not None:
+            ranges[column] = (None if low is None else low / scale, None if high is None else high / scale)
+    result, matches = table.query(ranges, sort_by, order == 'descending')
+    result[[column for column, _ in SCREENER_METRICS]] = format_kpis(result[[column for column, _ in SCREENER_METRICS]],
+                                                                     [kind for _, kind in SCREENER_METRICS])
+    return [
+            html.H5("{:,} of {:,} tickers match".format(matches, len(table))
+                    + (" (first {:,} shown)".format(len(result)) if matches > len(result) else ""), className = "subtitle row"),
+            render_table(result, key = 'screener', header = True),
+        ]
 
-    fig.update_xaxes(autorange = True,
-                     showline = True,
-                     #title = "Date",
-                     type = "date",
-                     showticklabels=True,
-                     linewidth=1.5, linecolor='LightGrey',
-                     mirror = True,
-                     row = 5, col = 1)
-    fig.update_yaxes(autorange = True,
-                     #tickprefix = '$',
-                     showgrid = False,
-                     #gridcolor= 'LightBlue',
-                     showline = True,
-                     tickmode = 'array',
-                     tickvals = [20, 50, 80],
-                     title = "KDJ",
-                     type = 'linear',
-                     zeroline = False,
-                     #zerolinecolor = 'Black',
-                     #zerolinewidth = 0.5,
-                     linewidth=1.5, linecolor='LightGrey',
-                     mirror = True,
-                     row = 5, col = 1)
-    return fig
+## scan the whole universe for the selected technical signals
+@app.callback(
+    Output('show_scan', 'children'),
+    [Input('scan-button', 'n_clicks')],
+    [State('scan_signals', 'value'), State('scan_within', 'value')]
+)
+def update_scan(n_clicks, signals, within):
+    if not n_clicks or not signals:
+        return []
+    hits = cached_scan(signals, int(within or 1))
+    if hits is None:
+        return [html.P("The price matrix has not been built yet (python lazyman_stock_research.py --build-matrix)",
+                       style = {'color': 'Grey'})]
+    return [html.Div([
+                      html.H6("{} ({})".format(SCAN_SIGNALS[signal][0], len(symbols)), className = "sub_subtitle padded", style = {'font-weight': 'bold'}),
+                      html.P(', '.join(symbols[:SCREENER_RESULT_LIMIT])
+                             + (" ... and {:,} more".format(len(symbols) - SCREENER_RESULT_LIMIT) if len(symbols) > SCREENER_RESULT_LIMIT else "")),
+                     ]) for signal, symbols in hits.items()]
 
 ## Update the Live data for Searched Stock and Market Index
 
@@ -1633,7 +3253,9 @@ def update_chart(n_clicks, input_value, start_date, end_date):
                Output('datetime', 'children')    , Output('marketstatus','children')],
                Input('interval-component1', 'n_intervals'))
 def update_indexes(n):
-    df = update_market_index()
+    df = get_market_index_snapshot()
+    if df is None:
+        raise PreventUpdate
     nasdaq_price  = df.iloc[0][1]
     nasdaq_change = df.iloc[0][2]
     dji_price     = df.iloc[1][1]
@@ -1660,20 +3282,27 @@ def update_indexes(n):
     return nasdaq_price, nasdaq_change, dji_price, dji_change, sp_price, sp_change, rut_price, rut_change, nasdaq_price_style, nasdaq_change_style, dji_price_style, dji_change_style, sp_price_style, sp_change_style, rut_price_style, rut_change_style, current_time_adj, marketstatus
 
 @app.callback(
-    Output('stock live', 'figure'),
+    [Output('stock live', 'figure'), Output('stock live state', 'data')],
     [Input('submit-button', 'n_clicks'), Input('interval-component2', 'n_intervals')],
-    [State('enter_ticker', 'value')]
+    [State('enter_ticker', 'value'), State('stock live state', 'data')]
 )
-def stock_live_chart(n_clicks, n, input_value):
+def stock_live_chart(n_clicks, n, input_value, state):
     input_value = input_value.upper()
     df, prev_df = live_price_df(input_value)
+    ## a new minute of the session already on screen only sends the new points
+    if (dash.callback_context.triggered_id == 'interval-component2' and prev_df.empty is False
+            and live_chart_current(state, input_value, df)):
+        ma20_values = live_indicators(input_value, df)['ma20']
+        return live_chart_patch(state, df, prev_df, extra = {2: ma20_values})
     fig = go.Figure()
+    state = None
     if df.empty is False and prev_df.empty is False:
-        ticker = yf.Ticker(input_value)
-        ticker_info = ticker.info
+        ticker_info = get_ticker_info(input_value)
+        ma20_values = np.asarray(live_indicators(input_value, df)['ma20'], dtype=float)
+        state = live_chart_state(input_value, df, len(df))
         line = go.Scatter(
                     x = df.index.strftime("%Y-%m-%d %H:%M:%S"),
-                    y = df['Close'],
+                    y = df['Close'].tolist(),
                     fill = 'tonexty',
                     hovertemplate = '$%{y:.2f}',
                     mode='lines',
@@ -1683,7 +3312,7 @@ def stock_live_chart(n_clicks, n, input_value):
         )
         benchmark = go.Scatter(
                     x = df.index.strftime("%Y-%m-%d %H:%M:%S"),
-                    y = np.array([prev_df.iloc[-1]['Close']]*len(df)),
+                    y = [prev_df.iloc[-1]['Close']]*len(df),
                     hovertemplate = '$%{y:.2f}',
                     #fillcolor = live_price_color(df,prev_df),
                     mode='lines',
@@ -1692,8 +3321,19 @@ def stock_live_chart(n_clicks, n, input_value):
                     name = "Pre-Day Close"
         )
 
+        ma20 = go.Scatter(
+                    x = df.index.strftime("%Y-%m-%d %H:%M:%S"),
+                    y = [None if v != v else v for v in ma20_values.tolist()],
+                    hovertemplate = '$%{y:.2f}',
+                    mode='lines',
+                    line=dict(color='#493CF0', width = 1),
+                    showlegend = False,
+                    name = "MA20"
+        )
+
         fig.add_trace(benchmark)
         fig.add_trace(line)
+        fig.add_trace(ma20)
         fig.update_layout(title = "<b>{}<b>".format(ticker_info['shortName']),
                           plot_bgcolor = '#DEDEDE',
                           hovermode="x unified",
@@ -1726,26 +3366,31 @@ def stock_live_chart(n_clicks, n, input_value):
                                       spikesnap = 'hovered data',
                                       tickformat="$,.2f"))
 
-    return fig
-
-
-@app.callback([Output('NASDAQ', 'figure')  , Output('DJI', 'figure'),
-               Output('SP500', 'figure')   , Output('RUT2000', 'figure')],
-               Input('interval-component2', 'n_intervals'))
-def update_indexes(n):
-    fig1 = live_price_fig("^IXIC")
-    fig1.update_layout(title = "<b>NASDAQ Index<b>")
+    return fig, state
 
-    fig2 = live_price_fig("^DJI")
-    fig2.update_layout(title = "<b>DJI Index<b>")
 
-    fig3 = live_price_fig("^GSPC")
-    fig3.update_layout(title = "<b>S&P500 Index<b>")
+LIVE_INDEX_CHARTS = [("^IXIC", "<b>NASDAQ Index<b>"), ("^DJI", "<b>DJI Index<b>"),
+                     ("^GSPC", "<b>S&P500 Index<b>"), ("^RUT", "<b>Russell2000 Index<b>")]
 
-    fig4 = live_price_fig("^RUT")
-    fig4.update_layout(title = "<b>Russell2000 Index<b>")
+@app.callback([Output('NASDAQ', 'figure')  , Output('DJI', 'figure'),
+               Output('SP500', 'figure')   , Output('RUT2000', 'figure'),
+               Output('index live state', 'data')],
+               Input('interval-component2', 'n_intervals'),
+               State('index live state', 'data'))
+def update_indexes(n, states):
+    states = dict(states or {})
+    figs = []
+    for ticker, title in LIVE_INDEX_CHARTS:
+        df, prev_df = live_price_df(ticker)
+        if prev_df.empty is False and live_chart_current(states.get(ticker), ticker, df):
+            fig, states[ticker] = live_chart_patch(states[ticker], df, prev_df)
+        else:
+            fig = live_price_fig(ticker, df, prev_df)
+            fig.update_layout(title = title)
+            states[ticker] = live_chart_state(ticker, df, len(fig.data[1].x)) if len(fig.data) else None
+        figs.append(fig)
 
-    return fig1, fig2, fig3, fig4
+    return figs + [states]
 
 app.index_string = """<!DOCTYPE html>
 <html>
@@ -1774,5 +3419,21 @@ app.index_string = """<!DOCTYPE html>
     </body>
 </html>"""
 
+startup_seconds = time.perf_counter() - startup_began
+if startup_seconds > STARTUP_BUDGET:
+    warnings.warn('startup took %.2fs, over the %.1fs budget' % (startup_seconds, STARTUP_BUDGET))
+
 if __name__ == '__main__':
-     app.run_server(debug=True)
\ No newline at end of file
+    parser = argparse.ArgumentParser(description = "Lazyman Stock Research")
+    parser.add_argument('--build-screener', action = 'store_true',
+                        help = "compute the screener table for the whole universe and exit (run nightly; resumes an interrupted build)")
+    parser.add_argument('--workers', type = int, default = None, help = "worker processes for --build-screener")
+    parser.add_argument('--build-matrix', action = 'store_true',
+                        help = "write a new price matrix version of the universe for the technical scan and exit")
+    args = parser.parse_args()
+    if args.build_screener:
+        print(build_screener(workers = args.workers))
+    elif args.build_matrix:
+        print(build_price_matrix())
+    else:
+        app.run_server(debug=True)
\ No newline at end of file